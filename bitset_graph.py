@@ -0,0 +1,78 @@
+from __future__ import annotations
+from collections.abc import Iterator
+from functools import cached_property
+import networkx as nx
+
+
+class BitsetGraph:
+    """
+    A read-only adjacency backend for the heuristics. The vertices are relabelled to 0, ..., n-1 in the order of the
+    original graph. neighbor_lists contains the adjacency lists of the indices, which the heap-based heuristics iterate,
+    and adjacency every neighbourhood as a Python integer whose i-th bit is set if vertex i is a neighbour, so that
+    inclusion tests of vertex sets become word-parallel & operations.
+
+    BitsetGraph offers nodes, neighbors() and degree() like a networkx graph, so it can be passed to the heuristics in
+    place of the conflict graph. Converting the conflict graph once lets several heuristics or restarts share the
+    relabelling.
+
+    :param graph: The graph, usually the conflict graph of a graph drawing.
+    """
+    nodes: list
+    index: dict
+    neighbor_lists: list[list[int]]
+
+    def __init__(self, graph: nx.Graph):
+        self.nodes = list(graph.nodes)
+        self.index = {v: i for i, v in enumerate(self.nodes)}
+        self.neighbor_lists = [[self.index[u] for u in graph.neighbors(v)] for v in self.nodes]
+
+    def __len__(self) -> int:
+        return len(self.nodes)
+
+    def __contains__(self, v) -> bool:
+        return v in self.index
+
+    def __iter__(self) -> Iterator:
+        return iter(self.nodes)
+
+    @cached_property
+    def adjacency(self) -> list[int]:
+        """
+        The neighbourhoods as bitsets. They are only built when they are used.
+        """
+        return [bits(neighbors) for neighbors in self.neighbor_lists]
+
+    def neighbors(self, v) -> Iterator:
+        return (self.nodes[u] for u in self.neighbor_lists[self.index[v]])
+
+    def degree(self, v) -> int:
+        return len(self.neighbor_lists[self.index[v]])
+
+    def labels(self, vertices: int | list[int]) -> list:
+        """
+        Translates a bitset or a list of vertex indices back to the vertices of the original graph.
+        """
+        if isinstance(vertices, int):
+            vertices = iter_bits(vertices)
+        return [self.nodes[v] for v in vertices]
+
+
+def as_bitset_graph(graph: nx.Graph | BitsetGraph) -> BitsetGraph:
+    return graph if isinstance(graph, BitsetGraph) else BitsetGraph(graph)
+
+
+def bits(vertices) -> int:
+    """
+    Returns the bitset of an iterable of vertex indices.
+    """
+    result = 0
+    for v in vertices:
+        result |= 1 << v
+    return result
+
+
+def iter_bits(bitset: int) -> Iterator[int]:
+    while bitset:
+        lowest = bitset & -bitset
+        yield lowest.bit_length() - 1
+        bitset ^= lowest
@@ -0,0 +1,200 @@
+from __future__ import annotations
+from itertools import groupby
+import multiprocessing
+import random
+
+from frame import FrameEvent, FrameEventType
+from frame_calculations import pareto_front_decomposition, pareto_sum, trace_sets
+from ilp import ILPResult, _gap, compute_frames_max_min
+from modified_greedy import compute_frames_greedy
+from tree_decomposition import select_tree_decomposition
+import networkx as nx
+
+
+def component_graphs(crossing_graph: nx.Graph) -> list[nx.Graph]:
+    """
+    Returns the connected components of the conflict graph as separate graphs, ordered by decreasing number of
+    vertices. The vertices of every component keep their order in the conflict graph.
+    """
+    components = [crossing_graph.subgraph(component).copy() for component in nx.connected_components(crossing_graph)]
+    return sorted(components, key=len, reverse=True)
+
+
+def pareto_optimal_pair_by_component(crossing_graph: nx.Graph, time_limit_tree_decomposition_seconds: float = 1.0,
+                                     deadline: float | None = None) -> (set, set):
+    """
+    Computes an optimal pair of disjoint independent sets like pareto_optimal_pair, but runs the DP on every connected
+    component separately. The Pareto fronts of the components are combined with pareto_sum, so the result is still
+    optimal, while the tree decompositions and the DP tables only ever cover a single component.
+
+    :param crossing_graph: The conflict graph.
+    :param time_limit_tree_decomposition_seconds: The total time budget of select_tree_decomposition, which is shared
+        among the components in proportion to their number of vertices.
+    :param deadline: A time of time.perf_counter after which the DP raises DeadlineExceeded, see pareto_optimal_pair.
+    :returns: The smaller and the larger set of an optimal pair.
+    """
+    num_vertices = max(crossing_graph.number_of_nodes(), 1)
+    front = [(0, 0, None)]
+    for component in component_graphs(crossing_graph):
+        time_limit = time_limit_tree_decomposition_seconds * component.number_of_nodes() / num_vertices
+        decomposition = select_tree_decomposition(component, time_limit).decomposition
+        front = pareto_sum(front, pareto_front_decomposition(component, decomposition, deadline=deadline))
+
+    best_triplet = max(front, key=lambda x: (min(x[0], x[1]), max(x[0], x[1])))
+    set_1, set_2 = trace_sets(best_triplet[2])
+    if set_1 < set_2:
+        return set_1, set_2
+    else:
+        return set_2, set_1
+
+
+def interleave_stories(stories: list[list[FrameEvent]]) -> list[FrameEvent]:
+    """
+    Combines stories of different connected components into one story. The initial frames are shown together in the
+    first frame, afterwards the stories are played one after the other, while every other component stays in its first
+    (if it has not been played yet) or last frame.
+
+    If component i has the frame sizes s_i, it is played while the components before it show their last and the ones
+    after it their first frame, so the minimum frame size is the minimum over i of min(s_i) plus these sizes. The
+    components whose last frame is at least as large as their first one are played first, by increasing depth of their
+    dip min(s_i) - first(s_i), the others afterwards, by decreasing depth of the dip min(s_i) - last(s_i). By an exchange
+    argument, this order maximizes the minimum frame size over all orders, and it is never smaller than the sum of the
+    minimum frame sizes of the stories.
+
+    :param stories: The sorted stories of the components. Each of them must only contain the edges of its component.
+    :returns: The sorted story of the whole drawing.
+    """
+    gaining, losing = [], []
+    for story in stories:
+        sizes, minimum, _ = FrameEvent.frame_sizes(story)
+        if len(sizes) == 0:
+            continue
+        first, last = int(sizes[0]), int(sizes[-1])
+        if last >= first:
+            gaining.append((first - minimum, story))
+        else:
+            losing.append((minimum - last, story))
+    gaining.sort(key=lambda entry: entry[0])
+    losing.sort(key=lambda entry: entry[0])
+    ordered = [story for _, story in gaining] + [story for _, story in losing]
+
+    frame_events = [e for story in ordered for e in story if e.time == 0]
+    time = 1
+    for story in ordered:
+        for _, group in groupby((e for e in story if e.time > 0), lambda e: e.time):
+            group = list(group)
+            frame_events.extend(FrameEvent(e.edge, time, e.frame_type) for e in group
+                                if e.frame_type == FrameEventType.OUT)
+            frame_events.extend(FrameEvent(e.edge, time, e.frame_type) for e in group
+                                if e.frame_type == FrameEventType.IN)
+            time += 1
+    return frame_events
+
+
+def restrict_story(frame_events: [FrameEvent], vertices) -> list[FrameEvent]:
+    """
+    Returns the story of a connected component that a story of the whole drawing induces: the events of the other
+    components are dropped and the frames in which the component does not change are skipped.
+    """
+    vertices = set(vertices)
+    restricted = []
+    time = 0
+    for t, group in groupby((e for e in frame_events if e.edge in vertices), lambda e: e.time):
+        if t > 0:
+            time += 1
+        restricted.extend(FrameEvent(e.edge, time, e.frame_type) for e in group)
+    return restricted
+
+
+def compute_frames_greedy_by_component(crossing_graph: nx.Graph, initial_frame: list[tuple[int, int]],
+                                       last_frame: list[tuple[int, int]], variation,
+                                       rng: random.Random | None = None) -> list[FrameEvent]:
+    """
+    Runs compute_frames_greedy on every connected component with the part of initial_frame and last_frame in the
+    component and combines the stories with interleave_stories.
+    """
+    initial_frame, last_frame = set(initial_frame), set(last_frame)
+    stories = [compute_frames_greedy(component, [v for v in component if v in initial_frame],
+                                     [v for v in component if v in last_frame], variation, rng)
+               for component in component_graphs(crossing_graph)]
+    return interleave_stories(stories)
+
+
+def compute_frames_max_min_by_component(crossing_graph: nx.Graph, frame_events: [FrameEvent] | None = None,
+                                        max_time_seconds: int | None = None, processes: int | None = None,
+                                        verbose: bool = False, horizon: str = "vertices", solver: str = "gurobi",
+                                        threads: int | None = None, planarity: str = "edges",
+                                        separate_cuts: bool = False) -> ILPResult:
+    """
+    Solves the ILP of compute_frames_max_min on every connected component in a process pool and combines the optimal
+    stories of the components with interleave_stories.
+
+    The objective is not separable: a story of the whole drawing shows all components at once, so maximizing the
+    minimum frame size of every component separately is a heuristic for the whole drawing. The minimum frame size of the
+    combined story is at least the sum of the objective values of the components. It is reported as objective_value,
+    together with the upper bound min over i of (bound_i + sum over j != i of alpha_j) as best_bound, where bound_i is
+    the best bound of the ILP of component i (|V_i| if it has no conflict edges, and at least the objective of its
+    story) and alpha_j = |V_j| - |M_j| bounds the independence number of component j by a maximal matching M_j.
+
+    :param crossing_graph: The conflict graph of the graph drawing.
+    :param frame_events: A feasible story of the whole drawing. Its restriction to every component is the warm start of
+        the ILP of the component, and it replaces the result of a component for which the ILP finds no solution.
+    :param max_time_seconds: The time limit of the ILP of every component.
+    :param processes: The number of worker processes. If processes=None, all cores are used. If processes=1, the ILPs
+        are solved in the current process.
+    :param verbose: Set the verbosity of the ILP solver.
+    :param horizon: The horizon of the ILP of every component, see compute_frames_max_min.
+    :param solver: The solver of the ILP of every component, see compute_frames_max_min.
+    :param threads: The number of threads of every solver. If threads=None, the solvers use their default in the
+        current process and a single thread in the pool, so that the workers do not compete for the cores.
+    :param planarity: The planarity rows of the ILP of every component, see compute_frames_max_min.
+    :param separate_cuts: Whether the ILP of every component separates cuts, see compute_frames_max_min.
+    :returns: The combined story.
+    """
+    components = component_graphs(crossing_graph)
+    warm_starts = [restrict_story(frame_events, component.nodes) if frame_events else None
+                   for component in components]
+    in_pool = not (processes == 1 or len(components) <= 1)
+    tasks = [(component, warm_start, max_time_seconds, verbose, horizon, solver,
+              1 if threads is None and in_pool else threads, planarity, separate_cuts)
+             for component, warm_start in zip(components, warm_starts)]
+
+    if not in_pool:
+        results = [_component_ilp_worker(task) for task in tasks]
+    else:
+        with multiprocessing.Pool(min(processes or multiprocessing.cpu_count(), len(tasks))) as pool:
+            results = pool.map(_component_ilp_worker, tasks)
+
+    stories = []
+    for result, warm_start in zip(results, warm_starts):
+        stories.append(list(result) if len(result) else warm_start)
+    if any(story is None for story in stories):
+        return ILPResult(frame_events=[], objective_value=float("nan"), best_bound=float("nan"), gap=float("inf"),
+                         time_limit_seconds=max_time_seconds)
+
+    alphas = [component.number_of_nodes() - len(nx.maximal_matching(component)) for component in components]
+    best_bound = min(_component_bound(component, result, story) + sum(alphas) - alpha
+                     for component, result, story, alpha in zip(components, results, stories, alphas))
+
+    combined = interleave_stories(stories)
+    objective_value = FrameEvent.frame_sizes(combined)[1]
+    return ILPResult(frame_events=combined, objective_value=objective_value, best_bound=best_bound,
+                     gap=_gap(objective_value, best_bound), time_limit_seconds=max_time_seconds)
+
+
+def _component_bound(component: nx.Graph, result: ILPResult, story: list[FrameEvent]) -> float:
+    """
+    The upper bound of a component. A component without conflict edges fits into one frame, so its bound is exact,
+    otherwise the bound of the ILP is raised to the objective of the story of the component if it is lower.
+    """
+    if component.number_of_edges() == 0:
+        return component.number_of_nodes()
+    return max(result.best_bound, FrameEvent.frame_sizes(story)[1])
+
+
+def _component_ilp_worker(task) -> ILPResult:
+    component, warm_start, max_time_seconds, verbose, horizon, solver, threads, planarity, separate_cuts = task
+    frames = FrameEvent.iter_crossing_frames(warm_start) if warm_start else None
+    return compute_frames_max_min(component, frame_events=warm_start, frames=frames, verbose=verbose,
+                                  max_time_seconds=max_time_seconds, horizon=horizon, solver=solver, threads=threads,
+                                  planarity=planarity, separate_cuts=separate_cuts)
@@ -1,5 +1,4 @@
 import csv
-import dataclasses
 import itertools
 import multiprocessing
 import os
@@ -12,16 +11,27 @@ from time import perf_counter
 from collections import defaultdict
 from matplotlib import pyplot as plt
 
-from frame import FrameEvent
+from components import compute_frames_greedy_by_component, compute_frames_max_min_by_component, \
+    pareto_optimal_pair_by_component
+from frame import FrameEvent, Story
 from frame_calculations import maximum_pair_b, maximum_pair_optimum_tree, maximum_pair_optimum_decomposition, \
-    maximum_pair_a, pareto_optimal_pair
+    maximum_pair_a, pareto_optimal_pair, heuristic_pair, DeadlineExceeded
 from ilp import compute_frames_max_min
+from io_tools.cache import PreprocessingCache
+from io_tools.corpus import Corpus
 from io_tools.crossing_graph import get_crossing_graph
 from io_tools.read_graph import read_hog
-from modified_greedy import compute_frames_greedy
+from local_search import improve_story
+from modified_greedy import compute_frames_greedy, compute_frames_greedy_multistart
+from tree_decomposition import estimate_dp_cost, select_tree_decomposition
+from validation import validate_story
 from tqdm import tqdm
 from itertools import product
 
+# The exact Pareto DP only checks its deadline between joins, so the worker gets this much extra time before it is
+# terminated.
+_PARETO_GRACE_SECONDS = 30
+
 
 class OutputFile:
 
@@ -56,6 +66,57 @@ class ExperimentManager:
     outfile: OutputFile
     time_limit_ilp_seconds: None | int
     time_limit_pareto_optimal_pair_seconds: None | int
+    cache: None | PreprocessingCache
+    """
+    If set, conflict graphs and tree decompositions are stored in and loaded from this cache.
+    """
+    greedy_restarts: int
+    """
+    If greedy_restarts > 1, every heuristic variant keeps the best of this many seeded greedy runs.
+    """
+    greedy_seed: int
+    time_limit_local_search_seconds: None | float
+    """
+    If set, the story of every heuristic variant is improved by local search with this time limit before it is used.
+    """
+    time_limit_tree_decomposition_seconds: float
+    """
+    The time budget for selecting the tree decomposition of the exact Pareto DP (heuristic variant 1).
+    """
+    dense_pareto_dp: bool
+    """
+    If True, the exact Pareto DP stores its fronts as NumPy arrays, see frame_calculations.max_plus_convolution.
+    """
+    pareto_dp_rows_per_second: None | float
+    """
+    If set, the exact Pareto DP is skipped when estimate_dp_cost(decomposition) / pareto_dp_rows_per_second exceeds
+    time_limit_pareto_optimal_pair_seconds, instead of waiting for the timeout.
+    """
+    ilp_horizon: str
+    """
+    The horizon of the ILP, see compute_frames_max_min. "bound" and "warm_start" use the best heuristic story.
+    """
+    ilp_solver: str
+    """
+    The solver of the ILP, "gurobi" or "cp-sat", see compute_frames_max_min.
+    """
+    ilp_threads: None | int
+    """
+    The number of threads of the ILP solver. If None, the solver's default is used.
+    """
+    ilp_planarity: str
+    """
+    The planarity rows of the ILP, "edges" or "cliques", see compute_frames_max_min.
+    """
+    ilp_separate_cuts: bool
+    """
+    Whether the ILP separates clique and odd-cycle cuts in a callback. Only supported by the solver "gurobi".
+    """
+    split_components: bool
+    """
+    If True, the exact Pareto DP, the greedy heuristic (without restarts) and the ILP solve every connected component of
+    the conflict graph separately, see components.py. The per-component ILPs run in parallel.
+    """
 
     def __init__(self, outfile_name: str):
         self.heuristic_variants = []
@@ -63,6 +124,22 @@ class ExperimentManager:
         self._tqdm_progress_bar = None
         self.time_limit_ilp_seconds = None
         self.time_limit_pareto_optimal_pair_seconds = None
+        self.cache = None
+        self.greedy_restarts = 1
+        self.greedy_seed = 0
+        self.time_limit_local_search_seconds = None
+        self.time_limit_tree_decomposition_seconds = 1.0
+        self.dense_pareto_dp = False
+        self.pareto_dp_rows_per_second = None
+        self._pareto_dp_skipped = False
+        self.split_components = False
+        self.ilp_horizon = "vertices"
+        self.ilp_solver = "gurobi"
+        self.ilp_threads = None
+        self.ilp_planarity = "edges"
+        self.ilp_separate_cuts = False
+        self._pareto_time_limit_reached = False
+        self._pareto_pool = None
 
         self._cmp_frames = {
         "1": self._pareto_optimal_pair_with_timeout,
@@ -74,11 +151,36 @@ class ExperimentManager:
         self.heuristic_variants.extend(*args)
 
     def run_hog_suite(self, directory: str, remove_isolated_vertices: bool = True):
+        """
+        Runs the experiments on all graphs of a directory or of a corpus file written by io_tools.corpus.pack_corpus.
+        """
         graphs_in_out_file = self.outfile.names_in_file()
-        graphs = [g for g in os.listdir(directory) if g.split(".")[0] not in graphs_in_out_file]
-        self._tqdm_progress_bar = tqdm(self._generate_hog_crossing_graphs(directory, graphs),
-                                       total=len(graphs), desc="Running Experiments")
 
+        if os.path.isfile(directory):
+            corpus = Corpus(directory)
+            graphs = [g for g in corpus.names if g.split(".")[0] not in graphs_in_out_file]
+            crossing_graphs = self._generate_corpus_crossing_graphs(corpus, graphs)
+        else:
+            graphs = [g for g in os.listdir(directory) if g.split(".")[0] not in graphs_in_out_file]
+            crossing_graphs = self._generate_hog_crossing_graphs(directory, graphs)
+
+        self._tqdm_progress_bar = tqdm(crossing_graphs, total=len(graphs), desc="Running Experiments")
+
+        try:
+            self._run_graphs(remove_isolated_vertices)
+        finally:
+            self.close()
+
+    def close(self):
+        """
+        Stops the worker process of the exact Pareto DP. It is started again when it is needed.
+        """
+        if self._pareto_pool is not None:
+            self._pareto_pool.terminate()
+            self._pareto_pool.join()
+            self._pareto_pool = None
+
+    def _run_graphs(self, remove_isolated_vertices: bool):
         for crossing_graph, graph_name in self._tqdm_progress_bar:
             self._tqdm_progress_bar.set_description(f'Running {graph_name}')
             self._tqdm_progress_bar.set_postfix({"num_nodes": len(crossing_graph.nodes),
@@ -93,8 +195,8 @@ class ExperimentManager:
                 crossing_graph.remove_nodes_from(isolated_vertices)
 
             # results = {"name": graph_name} | self._run_heuristics(crossing_graph) | self._run_ilp(crossing_graph)
-            heuristic_results, best_h_result, best_frames = self._run_heuristics(crossing_graph)
-            results = {"name": graph_name} | heuristic_results | self._run_ilp(crossing_graph, best_h_result, best_frames)
+            heuristic_results, best_h_result = self._run_heuristics(crossing_graph)
+            results = {"name": graph_name} | heuristic_results | self._run_ilp(crossing_graph, best_h_result)
             self.outfile.update(results)
 
     def _generate_hog_crossing_graphs(self, directory: str, graphs: list[str]) -> (str, nx.Graph):
@@ -102,15 +204,26 @@ class ExperimentManager:
             graph, coordinates = read_hog(os.path.join(directory, graph_file))
             # CHANGE THIS LINE IF RUNNING THE CODE ON THE REAL AND THE RANDOM GRAPHS
             yield graph, graph_file.split(".")[0]
-            # yield get_crossing_graph(graph, coordinates), graph_file.split(".")[0]
+            # yield self._get_crossing_graph(os.path.join(directory, graph_file), graph, coordinates), graph_file.split(".")[0]
+
+    def _generate_corpus_crossing_graphs(self, corpus: Corpus, graphs: list[str]) -> (str, nx.Graph):
+        for graph_file in graphs:
+            graph, coordinates = corpus[graph_file].to_networkx()
+            # CHANGE THIS LINE IF RUNNING THE CODE ON THE REAL AND THE RANDOM GRAPHS
+            yield graph, graph_file.split(".")[0]
+            # yield corpus.crossing_graph(graph_file), graph_file.split(".")[0]
+
+    def _get_crossing_graph(self, file: str, graph: nx.Graph, coordinates: dict) -> nx.Graph:
+        if self.cache is not None:
+            return self.cache.crossing_graph(file, graph, coordinates)
+        return get_crossing_graph(graph, coordinates)
 
     def _run_heuristics(self, crossing_graph: nx.Graph) -> tuple[
-        dict[str, dict[str, float | int | list[dict[str, Any]]]], Any | None, Any | None]:
+        dict[str, dict[str, float | int | list[dict[str, Any]]]], Any | None]:
         result = {}
 
         best_heuristic_obj = float('-inf')
         best_h_result = None
-        best_frames = None
 
         for frame_variant, selection_variant in self.heuristic_variants:
             t1_init_last_frame = perf_counter()
@@ -121,38 +234,75 @@ class ExperimentManager:
                 result[f'{frame_variant}{selection_variant}'] = {
                     "time_to_compute_initial_last_frame_seconds": t2_init_last_frame - t1_init_last_frame,
                     "time_limit_pareto_optimal_reached": True,
+                    "time_limit_pareto_optimal_predicted": frame_variant == "1" and self._pareto_dp_skipped,
                     "computation_time_seconds": None,
                     "obj_value": None,
                     "frame_events": None
                 }
                 continue
 
+            restart_objectives = None
             t1_heuristic = perf_counter()
-            h_result = compute_frames_greedy(crossing_graph, initial_frame=init_frame, last_frame=final_frame,
-                                           variation=selection_variant)
+            if self.greedy_restarts > 1:
+                multistart_result = compute_frames_greedy_multistart(crossing_graph, init_frame, final_frame,
+                                                                     selection_variant, self.greedy_restarts,
+                                                                     seed=self.greedy_seed)
+                h_result = multistart_result.frame_events
+                restart_objectives = multistart_result.objectives
+            elif self.split_components:
+                h_result = compute_frames_greedy_by_component(crossing_graph, init_frame, final_frame, selection_variant)
+            else:
+                h_result = compute_frames_greedy(crossing_graph, initial_frame=init_frame, last_frame=final_frame,
+                                               variation=selection_variant)
             t2_heuristic = perf_counter()
 
-            frames = FrameEvent.to_crossing_frames(h_result)
-            heuristic_obj = min(len(g.nodes) for g in frames)
+            _, heuristic_obj, _ = FrameEvent.frame_sizes(h_result)
+
+            greedy_obj = heuristic_obj
+            local_search_time = None
+            if self.time_limit_local_search_seconds is not None:
+                t1_local_search = perf_counter()
+                local_search_result = improve_story(crossing_graph, h_result, self.time_limit_local_search_seconds,
+                                                    seed=self.greedy_seed)
+                local_search_time = perf_counter() - t1_local_search
+                h_result = local_search_result.frame_events
+                heuristic_obj = local_search_result.objective
 
             result[f'{frame_variant}{selection_variant}'] = {
                 "time_to_compute_initial_last_frame_seconds": t2_init_last_frame-t1_init_last_frame,
                 "computation_time_seconds": t2_heuristic - t1_heuristic,
                 "obj_value": heuristic_obj,
-                "frame_events": [dataclasses.asdict(event) for event in h_result]
+                "greedy_obj_value": greedy_obj,
+                "local_search_time_seconds": local_search_time,
+                "time_limit_pareto_optimal_reached": frame_variant == "1" and self._pareto_time_limit_reached,
+                "restart_obj_values": restart_objectives,
+                "violations": validate_story(crossing_graph, h_result),
+                "frame_events": Story.from_frame_events(h_result).to_json()
             }
 
             if heuristic_obj > best_heuristic_obj:
                 best_heuristic_obj = heuristic_obj
                 best_h_result = h_result
-                best_frames = frames
 
-        return result, best_h_result, best_frames
+        return result, best_h_result
+
 
+    def _run_ilp(self, crossing_graph: nx.Graph, frame_events:[]) -> dict:
+        # The warm start only needs every frame once, so the frames are streamed instead of copied.
+        frames = FrameEvent.iter_crossing_frames(frame_events) if frame_events else None
 
-    def _run_ilp(self, crossing_graph: nx.Graph, frame_events:[], frames:[]) -> dict:
         t1 = perf_counter()
-        ilp_result = compute_frames_max_min(crossing_graph, frame_events=frame_events, frames=frames, verbose=False, max_time_seconds=self.time_limit_ilp_seconds)
+        if self.split_components:
+            ilp_result = compute_frames_max_min_by_component(crossing_graph, frame_events=frame_events,
+                                                             max_time_seconds=self.time_limit_ilp_seconds,
+                                                             horizon=self.ilp_horizon, solver=self.ilp_solver,
+                                                             threads=self.ilp_threads, planarity=self.ilp_planarity,
+                                                             separate_cuts=self.ilp_separate_cuts)
+        else:
+            ilp_result = compute_frames_max_min(crossing_graph, frame_events=frame_events, frames=frames, verbose=False, max_time_seconds=self.time_limit_ilp_seconds,
+                                                horizon=self.ilp_horizon, iterate_horizon=True, solver=self.ilp_solver,
+                                                threads=self.ilp_threads, planarity=self.ilp_planarity,
+                                                separate_cuts=self.ilp_separate_cuts)
         t2 = perf_counter()
 
         return {"ILP": {
@@ -160,34 +310,74 @@ class ExperimentManager:
             "obj_value": ilp_result.objective_value,
             "best_bound": ilp_result.best_bound,
             "gap": ilp_result.gap,
-            "frame_events": [dataclasses.asdict(event) for event in ilp_result]
+            "solver": self.ilp_solver,
+            "planarity": self.ilp_planarity,
+            "num_frames": ilp_result.num_frames,
+            "violations": validate_story(crossing_graph, ilp_result) if len(ilp_result) else None,
+            "frame_events": Story.from_frame_events(ilp_result).to_json()
         }}
 
     def _pareto_optimal_pair_with_timeout(self, crossing_graph: nx.Graph):
-        mp_manager = multiprocessing.Manager()
-        result_container = mp_manager.dict()
-        process = multiprocessing.Process(
-            target=_pareto_optimal_pair_worker,
-            args=(crossing_graph, result_container)
+        """
+        Runs the exact Pareto DP in a long-lived worker process. If the DP does not finish within
+        time_limit_pareto_optimal_pair_seconds, the worker returns heuristic_pair instead. Only if a single join
+        overruns the deadline by more than _PARETO_GRACE_SECONDS, the worker is terminated and (None, None) is returned.
+        """
+        self._pareto_dp_skipped = False
+        self._pareto_time_limit_reached = False
+        if self.split_components:
+            # Every component selects its own decomposition in the worker, so there is nothing to predict here.
+            return self._run_pareto_optimal_pair_worker(crossing_graph, None)
+
+        if self.cache is not None:
+            _, decomposition = self.cache.tree_decomposition(crossing_graph, self.time_limit_tree_decomposition_seconds)
+        else:
+            decomposition = select_tree_decomposition(crossing_graph,
+                                                      self.time_limit_tree_decomposition_seconds).decomposition
+
+        if self.pareto_dp_rows_per_second is not None and self.time_limit_pareto_optimal_pair_seconds is not None:
+            predicted_seconds = estimate_dp_cost(decomposition) / self.pareto_dp_rows_per_second
+            if predicted_seconds > self.time_limit_pareto_optimal_pair_seconds:
+                self._pareto_dp_skipped = True
+                return None, None
+
+        return self._run_pareto_optimal_pair_worker(crossing_graph, decomposition)
+
+    def _run_pareto_optimal_pair_worker(self, crossing_graph: nx.Graph, decomposition):
+        if self._pareto_pool is None:
+            self._pareto_pool = multiprocessing.Pool(1)
+
+        time_limit = self.time_limit_pareto_optimal_pair_seconds
+        async_result = self._pareto_pool.apply_async(
+            _pareto_optimal_pair_worker,
+            (crossing_graph, decomposition, self.dense_pareto_dp, self.split_components,
+             self.time_limit_tree_decomposition_seconds, time_limit)
         )
 
-        process.start()
-        process.join(timeout=self.time_limit_pareto_optimal_pair_seconds)
-
-        if process.is_alive():
-            process.terminate()
-            process.join()
+        try:
+            pair, self._pareto_time_limit_reached = async_result.get(
+                None if time_limit is None else time_limit + _PARETO_GRACE_SECONDS)
+        except multiprocessing.TimeoutError:
+            self.close()
             return None, None
 
-        return result_container.get('result', (None, None))
+        return pair
 
 
-def _pareto_optimal_pair_worker(crossing_graph, return_dict):
+def _pareto_optimal_pair_worker(crossing_graph, decomposition=None, dense=False, split_components=False,
+                                time_limit_tree_decomposition_seconds=1.0, time_limit_seconds=None):
+        deadline = None if time_limit_seconds is None else perf_counter() + time_limit_seconds
         try:
-            res = pareto_optimal_pair(crossing_graph)
-            return_dict['result'] = res
+            if split_components:
+                res = pareto_optimal_pair_by_component(crossing_graph, time_limit_tree_decomposition_seconds,
+                                                       deadline=deadline)
+            else:
+                res = pareto_optimal_pair(crossing_graph, decomposition, dense, deadline=deadline)
+            return res, False
+        except DeadlineExceeded:
+            return heuristic_pair(crossing_graph), True
         except Exception as e:
-            return_dict['result'] = (None, None)
+            return (None, None), False
 
 if __name__ == '__main__':
     manager = ExperimentManager("res_trees.json")
@@ -195,4 +385,7 @@ if __name__ == '__main__':
     manager.add_heuristic_variants(variants)
     manager.time_limit_ilp_seconds = 15*60
     manager.time_limit_pareto_optimal_pair_seconds = 10*60
+    manager.cache = PreprocessingCache()
+    # A conservative throughput of the decomposition DP, measured on the ER conflict graphs.
+    manager.pareto_dp_rows_per_second = 100_000
     manager.run_hog_suite(os.path.join("graphgenerator", "trees"))
@@ -1,8 +1,11 @@
 from __future__ import annotations
+from collections.abc import Iterator, Sequence
 from dataclasses import dataclass
 from enum import IntEnum
 from itertools import groupby
+import io
 import networkx as nx
+import numpy as np
 
 
 class FrameEventType(IntEnum):
@@ -37,20 +40,7 @@ class FrameEvent:
         :param vertices: A list of all vertices of the graph.
         :returns: A list of graphs.
         """
-        frames = []
-
-        current_graph = nx.Graph()
-        current_graph.add_nodes_from(vertices)
-
-        for time, group in groupby(frame_events, lambda e: e.time):
-            for frame_event in group:
-                if frame_event.frame_type == FrameEventType.IN:
-                    current_graph.add_edge(*frame_event.edge)
-                elif frame_event.frame_type == FrameEventType.OUT:
-                    current_graph.remove_edge(*frame_event.edge)
-            frames.append(current_graph.copy())
-
-        return frames
+        return [frame.copy() for frame in FrameEvent.iter_frames(frame_events, vertices)]
 
     @staticmethod
     def to_crossing_frames(frame_events: [FrameEvent]) -> [nx.Graph]:
@@ -61,16 +51,187 @@ class FrameEvent:
         :param frame_events: A list of frame events.
         :returns: A list of graphs.
         """
-        frames = []
+        return [frame.copy() for frame in FrameEvent.iter_crossing_frames(frame_events)]
+
+    @staticmethod
+    def iter_frames(frame_events: [FrameEvent], vertices: []) -> Iterator[nx.Graph]:
+        """
+        The streaming version of to_frames. Instead of copying the graph after every frame, the same graph is yielded
+        again and again, so it is only valid until the next frame is requested.
+
+        :param frame_events: A list of frame events.
+        :param vertices: A list of all vertices of the graph.
+        :returns: An iterator over the frames.
+        """
+        current_graph = nx.Graph()
+        current_graph.add_nodes_from(vertices)
+
+        for _, added, removed in FrameEvent.frame_deltas(frame_events):
+            current_graph.remove_edges_from(removed)
+            current_graph.add_edges_from(added)
+            yield current_graph
+
+    @staticmethod
+    def iter_crossing_frames(frame_events: [FrameEvent]) -> Iterator[nx.Graph]:
+        """
+        The streaming version of to_crossing_frames. Instead of copying the graph after every frame, the same graph is
+        yielded again and again, so it is only valid until the next frame is requested.
 
+        :param frame_events: A list of frame events.
+        :returns: An iterator over the frames.
+        """
         current_graph = nx.Graph()
-        # frames.append(current_graph.copy())
+
+        for _, added, removed in FrameEvent.frame_deltas(frame_events):
+            current_graph.remove_nodes_from(removed)
+            current_graph.add_nodes_from(added)
+            yield current_graph
+
+    @staticmethod
+    def frame_deltas(frame_events: [FrameEvent]) -> Iterator[tuple[int, list, list]]:
+        """
+        Yields for every frame its time, the edges that appear and the edges that disappear, assuming that the list of
+        frame events is sorted. Since OUT events are sorted before IN events, the removed edges have to be applied
+        before the added edges.
+
+        :param frame_events: A list of frame events.
+        :returns: An iterator over the triples (time, added edges, removed edges).
+        """
         for time, group in groupby(frame_events, lambda e: e.time):
+            added, removed = [], []
             for frame_event in group:
                 if frame_event.frame_type == FrameEventType.IN:
-                    current_graph.add_node(frame_event.edge)
+                    added.append(frame_event.edge)
                 elif frame_event.frame_type == FrameEventType.OUT:
-                    current_graph.remove_node(frame_event.edge)
-            frames.append(current_graph.copy())
+                    removed.append(frame_event.edge)
+            yield time, added, removed
+
+    @staticmethod
+    def frame_sizes(frame_events: [FrameEvent] | Story) -> tuple[np.ndarray, int, int]:
+        """
+        Computes the number of edges in every frame without building the frames, assuming that the list of frame
+        events is sorted. This takes O(#events) time.
+
+        :param frame_events: A list of frame events or a story.
+        :returns: The number of edges per frame, the minimum number of edges in a frame and the index of the first
+        frame with the minimum number of edges. If there are no frame events, the minimum is 0 and the index is -1.
+        """
+        if isinstance(frame_events, Story):
+            times, frame_types = frame_events.times, frame_events.frame_types
+        else:
+            times = np.fromiter((e.time for e in frame_events), dtype=np.int64, count=len(frame_events))
+            frame_types = np.fromiter((e.frame_type for e in frame_events), dtype=np.int8, count=len(frame_events))
 
-        return frames
+        if len(times) == 0:
+            return np.zeros(0, dtype=np.int64), 0, -1
+
+        counts = np.cumsum(np.where(frame_types == FrameEventType.IN, 1, -1))
+        # A frame ends with the last event of every group of consecutive events with the same time.
+        last_events = np.flatnonzero(np.append(times[1:] != times[:-1], True))
+        sizes = counts[last_events]
+
+        argmin = int(np.argmin(sizes))
+        return sizes, int(sizes[argmin]), argmin
+
+
+class Story(Sequence):
+    """
+    A compact container for a list of frame events. The events are stored in parallel NumPy arrays (edge id, time and
+    frame type), and the edge ids refer to a table of edges. Indexing and iterating a story lazily create FrameEvent
+    objects, so a story can be used wherever a list of frame events is expected.
+
+    :param edges: The table of edges, i.e., edges[i] is the edge with id i.
+    :param edge_ids: The edge id of every event.
+    :param times: The time of every event.
+    :param frame_types: The FrameEventType of every event.
+    """
+    edges: list
+    edge_ids: np.ndarray
+    times: np.ndarray
+    frame_types: np.ndarray
+
+    def __init__(self, edges: list, edge_ids: np.ndarray, times: np.ndarray, frame_types: np.ndarray):
+        self.edges = edges
+        self.edge_ids = np.asarray(edge_ids, dtype=np.int64)
+        self.times = np.asarray(times, dtype=np.int64)
+        self.frame_types = np.asarray(frame_types, dtype=np.int8)
+
+    @staticmethod
+    def from_frame_events(frame_events: [FrameEvent]) -> Story:
+        """
+        Creates a story from a list of frame events, keeping their order.
+        """
+        edges = []
+        edge_index = dict()
+        edge_ids = []
+        for frame_event in frame_events:
+            if frame_event.edge not in edge_index:
+                edge_index[frame_event.edge] = len(edges)
+                edges.append(frame_event.edge)
+            edge_ids.append(edge_index[frame_event.edge])
+
+        times = [frame_event.time for frame_event in frame_events]
+        frame_types = [frame_event.frame_type for frame_event in frame_events]
+        return Story(edges, edge_ids, times, frame_types)
+
+    def __len__(self) -> int:
+        return len(self.times)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return Story(self.edges, self.edge_ids[index], self.times[index], self.frame_types[index])
+
+        return FrameEvent(self.edges[self.edge_ids[index]], int(self.times[index]),
+                          FrameEventType(int(self.frame_types[index])))
+
+    def __iter__(self):
+        for edge_id, time, frame_type in zip(self.edge_ids.tolist(), self.times.tolist(), self.frame_types.tolist()):
+            yield FrameEvent(self.edges[edge_id], time, FrameEventType(frame_type))
+
+    def sorted(self) -> Story:
+        """
+        Returns the story sorted by time and frame type (OUT before IN). Like sorted() on a list of frame events, the
+        order of events with the same time and frame type is kept.
+        """
+        order = np.lexsort((self.frame_types, self.times))
+        return Story(self.edges, self.edge_ids[order], self.times[order], self.frame_types[order])
+
+    def between(self, start: int, end: int) -> Story:
+        """
+        Returns all events with start <= time < end, assuming that the story is sorted.
+        """
+        i, j = np.searchsorted(self.times, [start, end], side="left")
+        return self[i:j]
+
+    def frame_sizes(self) -> tuple[np.ndarray, int, int]:
+        """
+        See FrameEvent.frame_sizes.
+        """
+        return FrameEvent.frame_sizes(self)
+
+    def to_json(self) -> list[dict]:
+        """
+        Returns the events as a list of dictionaries, i.e., the same as dataclasses.asdict for every frame event.
+        """
+        edges = self.edges
+        return [{"edge": edges[edge_id], "time": time, "frame_type": frame_type} for edge_id, time, frame_type
+                in zip(self.edge_ids.tolist(), self.times.tolist(), self.frame_types.tolist())]
+
+    def to_bytes(self) -> bytes:
+        """
+        Encodes the story in the binary .npz format. The edges must be integers or tuples of integers.
+        """
+        buffer = io.BytesIO()
+        np.savez(buffer, edges=np.asarray(self.edges, dtype=np.int64), edge_ids=self.edge_ids, times=self.times,
+                 frame_types=self.frame_types)
+        return buffer.getvalue()
+
+    @staticmethod
+    def from_bytes(data: bytes) -> Story:
+        """
+        Decodes a story that was encoded with to_bytes.
+        """
+        with np.load(io.BytesIO(data)) as arrays:
+            edges = arrays["edges"]
+            edges = edges.tolist() if edges.ndim == 1 else [tuple(edge) for edge in edges.tolist()]
+            return Story(edges, arrays["edge_ids"], arrays["times"], arrays["frame_types"])
@@ -1,80 +1,143 @@
-from itertools import product
+from __future__ import annotations
+from heapq import heappop
+from operator import itemgetter
+from time import perf_counter
+from typing import Any, NamedTuple
 import networkx as nx
+import numpy as np
+
+from bitset_graph import BitsetGraph, as_bitset_graph
+from tree_decomposition import select_tree_decomposition
 # from functools import cache
 
+# Marks the entries of a dense Pareto front for which no pair of sets exists.
+_INFEASIBLE = -(1 << 40)
 
-def maximum_pair_b(crossing_graph: nx.Graph) -> (list, list):
-	initial_frame = []
-	last_frame = []
-	V = set(crossing_graph.nodes)
 
-	while len(initial_frame) < len(V) / 2:
-		I1_set = set(initial_frame)
-		N_I1 = set()
-		for v in initial_frame:
-			N_I1.update(crossing_graph.neighbors(v))
+class DeadlineExceeded(Exception):
+	"""
+	Raised by the exact DPs if their deadline passes before the DP is finished.
+	"""
+
 
-		candidates = V - I1_set - N_I1
-		if not candidates:
+def maximum_pair_b(crossing_graph: nx.Graph | BitsetGraph) -> (list, list):
+	"""
+	Greedily picks an independent set of minimum degree vertices for the initial frame (at most half of the vertices)
+	and then one for the last frame among the remaining vertices. Ties are broken by the order of the vertices in the
+	conflict graph.
+
+	The candidates are kept in a heap ordered by (degree, index). A vertex that is chosen or next to a chosen vertex is
+	marked as blocked and dropped from the heap when it reaches the top, so every vertex and edge is handled once per
+	frame.
+	"""
+	graph = as_bitset_graph(crossing_graph)
+	nodes, adjacency = graph.nodes, graph.neighbor_lists
+	degree = [len(neighbors) for neighbors in adjacency]
+
+	initial_frame = []
+	in_initial_frame = [False] * len(nodes)
+	blocked = [False] * len(nodes)
+	# A sorted list is a valid heap.
+	heap = sorted((degree[v], v) for v in range(len(nodes)))
+	while len(initial_frame) < len(nodes) / 2:
+		min_deg_node = _pop_unblocked(heap, blocked)
+		if min_deg_node is None:
 			break
 
-		min_deg_node = min(candidates, key=lambda u: crossing_graph.degree(u))
 		initial_frame.append(min_deg_node)
+		in_initial_frame[min_deg_node] = True
+		blocked[min_deg_node] = True
+		for u in adjacency[min_deg_node]:
+			blocked[u] = True
 
+	# The neighbours of the initial frame are candidates for the last frame again.
+	last_frame = []
+	blocked = in_initial_frame
+	heap = sorted((degree[v], v) for v in range(len(nodes)) if not blocked[v])
 	while True:
-		I1_set = set(initial_frame)
-		I2_set = set(last_frame)
-		N_I2 = set()
-		for v in last_frame:
-			N_I2.update(crossing_graph.neighbors(v))
-
-		candidates = V - I1_set - I2_set - N_I2
-		if not candidates:
+		min_deg_node = _pop_unblocked(heap, blocked)
+		if min_deg_node is None:
 			break
 
-		min_deg_node = min(candidates, key=lambda v: crossing_graph.degree(v))
 		last_frame.append(min_deg_node)
+		blocked[min_deg_node] = True
+		for u in adjacency[min_deg_node]:
+			blocked[u] = True
 
-	return initial_frame, last_frame
+	return [nodes[v] for v in initial_frame], [nodes[v] for v in last_frame]
 
 
-def maximum_pair_a(crossing_graph: nx.Graph) -> (list, list):
-	j1 = []
-	j2 = []
-	v = set(crossing_graph.nodes)
+def maximum_pair_a(crossing_graph: nx.Graph | BitsetGraph) -> (list, list):
+	"""
+	Greedily grows two disjoint independent sets by alternately adding a vertex of minimum degree to each of them.
+	Ties are broken by the order of the vertices in the conflict graph.
 
-	i = 1
+	Every set has its own heap of candidates ordered by (degree, index) and its own blocked vertices, i.e., the vertices
+	of both sets and the neighbours of its own vertices. Blocked vertices are dropped lazily when they reach the top.
+	"""
+	graph = as_bitset_graph(crossing_graph)
+	nodes, adjacency = graph.nodes, graph.neighbor_lists
+	degree = [len(neighbors) for neighbors in adjacency]
+
+	j = ([], [])
+	blocked = ([False] * len(nodes), [False] * len(nodes))
+	heap = sorted((degree[v], v) for v in range(len(nodes)))
+	heaps = (heap, list(heap))
+
+	i = 0
 	while True:
-		ji = j1 if i == 1 else j2
-		n_ji = set()
-
-		for u in ji:
-			n_ji.update(crossing_graph.neighbors(u))
-
-		candidates = v - set(j1) - set(j2) - n_ji
-		if not candidates:
-			i = 3 - i
-			ji = j1 if i == 1 else j2
-			n_ji = set()
-			for u in ji:
-				n_ji.update(crossing_graph.neighbors(u))
-			candidates = v - set(j1) - set(j2) - n_ji
-			if not candidates:
+		min_deg_node = _pop_unblocked(heaps[i], blocked[i])
+		if min_deg_node is None:
+			i = 1 - i
+			if _peek_unblocked(heaps[i], blocked[i]) is None:
 				break
 			continue
 
-		min_deg_node = min(candidates, key=lambda u: crossing_graph.degree(u))
-		ji.append(min_deg_node)
-		i = 3 - i
+		j[i].append(min_deg_node)
+		blocked[0][min_deg_node] = True
+		blocked[1][min_deg_node] = True
+		for u in adjacency[min_deg_node]:
+			blocked[i][u] = True
+		i = 1 - i
 
+	j1, j2 = [nodes[v] for v in j[0]], [nodes[v] for v in j[1]]
 	if len(j1) <= len(j2):
 		return j1, j2
 	else:
 		return j2, j1
 
 
+def _peek_unblocked(heap: list[tuple[int, int]], blocked: list[bool]) -> int | None:
+	while heap and blocked[heap[0][1]]:
+		heappop(heap)
+	return heap[0][1] if heap else None
+
+
+def _pop_unblocked(heap: list[tuple[int, int]], blocked: list[bool]) -> int | None:
+	v = _peek_unblocked(heap, blocked)
+	if v is not None:
+		heappop(heap)
+	return v
+
+
 # @cache
-def maximum_pair_optimum_tree(crossing_graph: nx.Graph) -> (list, list):
+def maximum_pair_optimum_tree(crossing_graph: nx.Graph, dense: bool = False, lower_bound: int | None = None) -> (list, list):
+	"""
+	Computes an optimal pair of disjoint independent sets of a tree by dynamic programming over the three colours
+	(0: none, 1: first set, 2: second set) of every vertex. The Pareto fronts only store the sizes and a back-pointer,
+	the two sets are recovered by a single traceback at the root.
+
+	If dense is True, the fronts are NumPy arrays f[a] = largest b instead, see max_plus_convolution.
+
+	If lower_bound is given, it must be the value min(|I1|, |I2|) of some pair, e.g., of maximum_pair_a. Entries that
+	cannot reach this value with the vertices outside the processed subtree (see _OutsideBound) are discarded, which
+	keeps the fronts small and the result optimal.
+	"""
+	if dense:
+		return _maximum_pair_optimum_tree_dense(crossing_graph, lower_bound)
+
+	partition = _CliquePartition(crossing_graph) if lower_bound is not None else None
+	outside = dict()
 	root = nx.center(crossing_graph)[0]
 	parent = dict()
 	marked = set()
@@ -85,10 +148,12 @@ def maximum_pair_optimum_tree(crossing_graph: nx.Graph) -> (list, list):
 		node = stack[-1]
 		if node not in marked:
 			l_function[node] = {}
+			if partition is not None:
+				outside[node] = _OutsideBound(partition, (node,))
 			marked.add(node)
-			l_function[node][0] = [[0, 0, [set(), set()]]]
-			l_function[node][1] = [[1, 0, [{node}, set()]]]
-			l_function[node][2] = [[0, 1, [set(), {node}]]]
+			l_function[node][0] = [(0, 0, None)]
+			l_function[node][1] = [(1, 0, _Colored(node, 1))]
+			l_function[node][2] = [(0, 1, _Colored(node, 2))]
 			for neighbor in crossing_graph.neighbors(node):
 				if neighbor != parent[node]:
 					parent[neighbor] = node
@@ -99,111 +164,511 @@ def maximum_pair_optimum_tree(crossing_graph: nx.Graph) -> (list, list):
 				l_function[parent[node]][0] = pareto_sum(l_function[parent[node]][0], l_function[node][0] + l_function[node][1] + l_function[node][2])
 				l_function[parent[node]][1] = pareto_sum(l_function[parent[node]][1], l_function[node][0] + l_function[node][2])
 				l_function[parent[node]][2] = pareto_sum(l_function[parent[node]][2], l_function[node][0] + l_function[node][1])
+				del l_function[node]
+
+				if partition is not None:
+					outside[parent[node]] = outside[parent[node]].merge(outside.pop(node))
+					for color in range(3):
+						l_function[parent[node]][color] = _prune(l_function[parent[node]][color], outside[parent[node]], lower_bound)
 			else:
 				all_triplets = l_function[root][0] + l_function[root][1] + l_function[root][2]
 				best = max(all_triplets, key=lambda x: min(x[0], x[1]))
 
-	if best[2][0] < best[2][1]:
-		return best[2][0], best[2][1]
+	set_1, set_2 = trace_sets(best[2])
+	if set_1 < set_2:
+		return set_1, set_2
 	else:
-		return best[2][1], best[2][0]
+		return set_2, set_1
+
+
+def _maximum_pair_optimum_tree_dense(crossing_graph: nx.Graph, lower_bound: int | None) -> (set, set):
+	partition = _CliquePartition(crossing_graph) if lower_bound is not None else None
+	outside = dict()
+	root = nx.center(crossing_graph)[0]
+	pre_order, children = _rooted_pre_order(crossing_graph, root)
+
+	# The allowed colours of a child for every colour of its parent.
+	allowed_child_colors = ((0, 1, 2), (0, 2), (0, 1))
+
+	fronts = dict()
+	history = dict()
+	for node in reversed(pre_order):
+		front = [np.array([0]), np.array([_INFEASIBLE, 0]), np.array([1])]
+		if partition is not None:
+			outside[node] = _OutsideBound(partition, (node,))
+		steps = []
+		for child in children[node]:
+			child_front = fronts.pop(child)
+			if partition is not None:
+				outside[node] = outside[node].merge(outside.pop(child))
+			step = []
+			for color, allowed in enumerate(allowed_child_colors):
+				best_child, best_child_color = _elementwise_best(child_front, allowed)
+				front[color], split = max_plus_convolution(front[color], best_child)
+				if partition is not None:
+					_prune_dense(front[color], outside[node], lower_bound)
+				step.append((split, best_child_color))
+			steps.append((child, step))
+		fronts[node] = front
+		history[node] = steps
+
+	color, a = _best_entry(fronts.pop(root))
+
+	sets = (set(), set())
+	stack = [(root, color, a)]
+	while stack:
+		node, color, a = stack.pop()
+		if color != 0:
+			sets[color - 1].add(node)
+		for child, step in reversed(history[node]):
+			split, best_child_color = step[color]
+			child_a = int(split[a])
+			stack.append((child, int(best_child_color[child_a]), child_a))
+			a -= child_a
+
+	set_1, set_2 = sets
+	if set_1 < set_2:
+		return set_1, set_2
+	else:
+		return set_2, set_1
+
+
+def pareto_optimal_pair(crossing_graph: nx.Graph, tree_decomposition: nx.Graph = None, dense: bool = False,
+						prune: bool = False, deadline: float | None = None) -> (list, list):
+	"""
+	Computes an optimal pair with maximum_pair_optimum_decomposition. If prune is True, the pair of heuristic_pair is
+	used as the lower bound of the DP.
+
+	If deadline (a time of time.perf_counter) is given, the DP checks it after every join and raises DeadlineExceeded
+	once it has passed. Callers usually fall back to heuristic_pair then.
+	"""
+	if tree_decomposition is None:
+		tree_decomposition = select_tree_decomposition(crossing_graph).decomposition
+
+	lower_bound = None
+	if prune:
+		lower_bound = min(len(frame) for frame in heuristic_pair(crossing_graph))
+	return maximum_pair_optimum_decomposition(crossing_graph, tree_decomposition, dense, lower_bound, deadline)
+
+
+def heuristic_pair(crossing_graph: nx.Graph | BitsetGraph) -> (list, list):
+	"""
+	Returns the better pair of maximum_pair_a and maximum_pair_b, i.e., the one with the larger smaller set. Both
+	heuristics share one BitsetGraph.
+	"""
+	graph = as_bitset_graph(crossing_graph)
+	return max((heuristic(graph) for heuristic in (maximum_pair_a, maximum_pair_b)),
+			   key=lambda pair: min(len(frame) for frame in pair))
+
+
+def _check_deadline(deadline: float | None):
+	if deadline is not None and perf_counter() > deadline:
+		raise DeadlineExceeded()
+
+
+def maximum_pair_optimum_decomposition(crossing_graph: nx.Graph, tree_decomposition, dense: bool = False,
+									   lower_bound: int | None = None, deadline: float | None = None) -> (list, list):
+	"""
+	Computes an optimal pair of disjoint independent sets by dynamic programming over a tree decomposition.
+
+	The table of a bag maps every valid colouring of the bag (0: none, 1: first set, 2: second set, in the order of the
+	vertices in the conflict graph) to a Pareto front of (a, b, back-pointer) entries. The tree decomposition is
+	processed like a nice tree decomposition: the table of a bag is built by introducing its vertices one at a time,
+	the table of a child forgets the vertices that are not in the parent and is then joined into the parent's table.
+	The join looks up the child's front by the projection of every parent colouring onto the shared vertices, so it
+	takes one dictionary lookup per parent colouring instead of comparing all pairs of colourings.
 
+	If dense is True, the fronts are NumPy arrays f[a] = largest b instead, see max_plus_convolution.
 
-def pareto_optimal_pair(crossing_graph: nx.Graph) -> (list, list):
-	_, decomposition = nx.approximation.treewidth_min_fill_in(crossing_graph)
-	return maximum_pair_optimum_decomposition(crossing_graph, decomposition)
+	If lower_bound is given, it must be the value min(|I1|, |I2|) of some pair, e.g., of maximum_pair_a. Entries that
+	cannot reach this value with the vertices outside the processed subtree (see _OutsideBound) are discarded after
+	every join, which keeps the fronts small and the result optimal.
 
+	If deadline (a time of time.perf_counter) is given, DeadlineExceeded is raised after the first join that ends
+	after the deadline.
+	"""
+	if dense:
+		return _maximum_pair_optimum_decomposition_dense(crossing_graph, tree_decomposition, lower_bound, deadline)
 
-def maximum_pair_optimum_decomposition(crossing_graph: nx.Graph, tree_decomposition) -> (list, list):
+	front = pareto_front_decomposition(crossing_graph, tree_decomposition, lower_bound, deadline)
+	best_triplet = max(front, key=lambda x: (min(x[0], x[1]), max(x[0], x[1])))
+
+	set_1, set_2 = trace_sets(best_triplet[2])
+	if set_1 < set_2:
+		return set_1, set_2
+	else:
+		return set_2, set_1
+
+
+def pareto_front_decomposition(crossing_graph: nx.Graph, tree_decomposition, lower_bound: int | None = None,
+							   deadline: float | None = None) -> list[tuple[int, int, Any]]:
+	"""
+	Runs the DP of maximum_pair_optimum_decomposition and returns the Pareto front of all pairs of disjoint independent
+	sets as (|I1|, |I2|, back-pointer) entries. The sets of an entry are recovered with trace_sets, and fronts of
+	different components are combined with pareto_sum.
+	"""
+	partition = _CliquePartition(crossing_graph) if lower_bound is not None else None
+	order = {v: i for i, v in enumerate(crossing_graph.nodes)}
 	root = nx.center(tree_decomposition)[0]
-	parent = dict()
-	marked = set()
-	l_function = dict()
-	stack = [root]
-	parent[root] = None
-	while stack:
-		bag_node = stack[-1]
-		if bag_node not in marked:
-			marked.add(bag_node)
-			l_function[bag_node] = {}
-
-			# Generate all valid 3-colorings for the vertices in the bag
-			for coloring in product(range(3), repeat=len(bag_node)):
-				coloring_dict = dict(zip(bag_node, coloring))
-				valid = True
-				for u in bag_node:
-					for v in bag_node:
-						if u != v and crossing_graph.has_edge(u, v):
-							if ((coloring_dict[u] == 1 and coloring_dict[v] == 1) or
-									(coloring_dict[u] == 2 and coloring_dict[v] == 2)):
-								valid = False
-								break
-					if not valid:
-						break
-				if valid:
-					list_1 = {v for v in bag_node if coloring_dict[v] == 1}
-					list_2 = {v for v in bag_node if coloring_dict[v] == 2}
-					l_function[bag_node][coloring] = [[len(list_1), len(list_2), [list_1, list_2]]]
-
-			for neighbor in tree_decomposition.neighbors(bag_node):
-				if neighbor != parent[bag_node]:
-					parent[neighbor] = bag_node
-					stack.append(neighbor)
-		else:
-			bag_node = stack.pop()
-			if bag_node != root:
-
-				shared_vertices = set(bag_node) & set(parent[bag_node])
-
-				for parent_coloring, parent_value in l_function[parent[bag_node]].items():
-					l_comp = []
-					for parent_spec_coloring in parent_value:
-
-						for child_coloring, child_value in l_function[bag_node].items():
-							for child_spec_coloring in child_value:
-								compatible = True
-								for v in shared_vertices:
-									color1 = 1 if v in child_spec_coloring[2][0] else 2 if v in child_spec_coloring[2][1] else 0
-									color2 = 1 if v in parent_spec_coloring[2][0] else 2 if v in parent_spec_coloring[2][1] else 0
-									if color1 != color2:
-										compatible = False
-										break
-								if compatible:
-									a_1 = child_spec_coloring[0]-len(child_spec_coloring[2][0] & parent_spec_coloring[2][0])
-									b_1 = child_spec_coloring[1]-len(child_spec_coloring[2][1] & parent_spec_coloring[2][1])
-									pointers = child_spec_coloring[2]
-									l_comp.append([a_1, b_1, pointers])
-					if l_comp:
-						l_function[parent[bag_node]][parent_coloring] = pareto_sum(l_function[parent[bag_node]][parent_coloring], l_comp)
+	pre_order, children = _rooted_pre_order(tree_decomposition, root)
 
-			else:
-				best_triplet = None
-				max_min_value = float('-inf')
+	# The children of a bag are finished before the bag itself.
+	finished = dict()
+	for bag_node in reversed(pre_order):
+		bag = tuple(sorted(bag_node, key=order.__getitem__))
+		table = _introduce(crossing_graph, bag)
+		outside = _OutsideBound(partition, bag) if partition is not None else None
+
+		for child in children[bag_node]:
+			_check_deadline(deadline)
+			child_bag, child_table, child_outside = finished.pop(child)
+			shared = tuple(v for v in child_bag if v in bag_node)
+			table = _join(table, bag, _forget(child_table, child_bag, shared), shared)
 
-				for parent_coloring, parent_value in l_function[root].items():
-					for triplet in parent_value:
-						min_val = min(triplet[0], triplet[1])
-						if (min_val > max_min_value or
-								(min_val == max_min_value and max(triplet[0], triplet[1]) > max(best_triplet[0], best_triplet[1]))):
-							max_min_value = min_val
-							best_triplet = triplet
+			if partition is not None:
+				outside = outside.merge(child_outside)
+				table = {coloring: pruned for coloring, front in table.items()
+						 if (pruned := _prune(front, outside, lower_bound))}
 
-				if best_triplet[2][0] < best_triplet[2][1]:
-					return best_triplet[2][0], best_triplet[2][1]
-				else:
-					return best_triplet[2][1], best_triplet[2][0]
+		finished[bag_node] = (bag, table, outside)
 
+	bag, table, _ = finished.pop(root)
+	return _forget(table, bag, ())[()]
 
-def pareto_sum(l1: list[list[int, int, list]], l2: list[list[int, int, list]]) -> list[list]:
+
+def _maximum_pair_optimum_decomposition_dense(crossing_graph: nx.Graph, tree_decomposition,
+											   lower_bound: int | None, deadline: float | None) -> (set, set):
+	partition = _CliquePartition(crossing_graph) if lower_bound is not None else None
+	order = {v: i for i, v in enumerate(crossing_graph.nodes)}
+	root = nx.center(tree_decomposition)[0]
+	pre_order, children = _rooted_pre_order(tree_decomposition, root)
+
+	finished = dict()
+	history = dict()
+	for bag_node in reversed(pre_order):
+		bag = tuple(sorted(bag_node, key=order.__getitem__))
+		table = _introduce_dense(crossing_graph, bag)
+		outside = _OutsideBound(partition, bag) if partition is not None else None
+
+		steps = []
+		for child in children[bag_node]:
+			_check_deadline(deadline)
+			child_bag, child_table, child_outside = finished.pop(child)
+			shared = tuple(v for v in child_bag if v in bag_node)
+			forgotten, origin = _forget_dense(child_table, child_bag, shared)
+			if partition is not None:
+				outside = outside.merge(child_outside)
+
+			positions = [bag.index(v) for v in shared]
+			splits = dict()
+			for coloring, front in table.items():
+				table[coloring], splits[coloring] = max_plus_convolution(front, forgotten[tuple(coloring[i] for i in positions)])
+				if partition is not None:
+					_prune_dense(table[coloring], outside, lower_bound)
+			steps.append((child, positions, origin, splits))
+
+		finished[bag_node] = (bag, table, outside)
+		history[bag_node] = (bag, steps)
+
+	bag, table, _ = finished.pop(root)
+	forgotten, origin = _forget_dense(table, bag, ())
+	a = _best_entry([forgotten[()]])[1]
+	colorings, best_coloring = origin[()]
+
+	sets = (set(), set())
+	stack = [(root, colorings[best_coloring[a]], a)]
+	while stack:
+		bag_node, coloring, a = stack.pop()
+		bag, steps = history.pop(bag_node)
+		for v, color in zip(bag, coloring):
+			if color != 0:
+				sets[color - 1].add(v)
+
+		for child, positions, origin, splits in reversed(steps):
+			projection = tuple(coloring[i] for i in positions)
+			child_a = int(splits[coloring][a])
+			a -= child_a
+			colorings, best_coloring = origin[projection]
+			# The forgotten front does not count the shared vertices of the first set.
+			stack.append((child, colorings[best_coloring[child_a]], child_a + projection.count(1)))
+
+	set_1, set_2 = sets
+	if set_1 < set_2:
+		return set_1, set_2
+	else:
+		return set_2, set_1
+
+
+class _CliquePartition:
+	"""
+	A greedy partition of a graph into cliques. Vertices of low degree start a clique, which is extended by their
+	neighbours of high degree that are adjacent to the whole clique.
+	"""
+
+	def __init__(self, graph: nx.Graph):
+		self.clique_of = dict()
+		self.clique_size = []
+		for v in sorted(graph.nodes, key=graph.degree):
+			if v in self.clique_of:
+				continue
+			clique = [v]
+			for u in sorted(graph.neighbors(v), key=graph.degree, reverse=True):
+				if u not in self.clique_of and all(graph.has_edge(u, w) for w in clique):
+					clique.append(u)
+			for u in clique:
+				self.clique_of[u] = len(self.clique_size)
+			self.clique_size.append(len(clique))
+
+
+class _OutsideBound:
+	"""
+	Upper bounds on what the vertices outside a growing set S can add to a pair of disjoint independent sets. Every
+	independent set contains at most one vertex of every clique of the partition, so each set gains at most alpha, the
+	number of cliques that are not contained in S, and both sets together gain at most pair = sum(min(|C - S|, 2)).
+	"""
+
+	def __init__(self, partition: _CliquePartition, vertices):
+		self.partition = partition
+		self.vertices = set()
+		self._inside = dict()
+		self.alpha = len(partition.clique_size)
+		self.pair = sum(min(size, 2) for size in partition.clique_size)
+		for v in vertices:
+			self.add(v)
+
+	def add(self, v):
+		if v in self.vertices:
+			return
+		self.vertices.add(v)
+
+		clique = self.partition.clique_of[v]
+		size = self.partition.clique_size[clique]
+		inside = self._inside.get(clique, 0)
+		self._inside[clique] = inside + 1
+		self.pair -= min(size - inside, 2) - min(size - inside - 1, 2)
+		if inside + 1 == size:
+			self.alpha -= 1
+
+	def merge(self, other: _OutsideBound) -> _OutsideBound:
+		"""
+		Returns the bound of the union of both sets. The smaller set is added to the larger one, which is reused.
+		"""
+		large, small = (self, other) if len(self.vertices) >= len(other.vertices) else (other, self)
+		for v in small.vertices:
+			large.add(v)
+		return large
+
+
+def _prune(front: list[tuple[int, int, Any]], outside: _OutsideBound, lower_bound: int) -> list[tuple[int, int, Any]]:
+	"""
+	Keeps the entries (a, b) that can still reach lower_bound, i.e., min(a, b) + alpha >= lower_bound and
+	(a + b + pair) // 2 >= lower_bound.
+	"""
+	return [entry for entry in front if min(entry[0], entry[1]) + outside.alpha >= lower_bound
+			and (entry[0] + entry[1] + outside.pair) // 2 >= lower_bound]
+
+
+def _prune_dense(front: np.ndarray, outside: _OutsideBound, lower_bound: int) -> None:
+	a = np.arange(len(front))
+	hopeless = (np.minimum(a, front) + outside.alpha < lower_bound) | ((a + front + outside.pair) // 2 < lower_bound)
+	front[hopeless] = _INFEASIBLE
+
+
+def _rooted_pre_order(tree: nx.Graph, root) -> (list, dict):
+	"""
+	Returns the vertices of a tree in pre-order from the root and the children of every vertex.
+	"""
+	children = {root: []}
+	pre_order = []
+	stack = [root]
+	while stack:
+		node = stack.pop()
+		pre_order.append(node)
+		for neighbor in tree.neighbors(node):
+			if neighbor not in children:
+				children[neighbor] = []
+				children[node].append(neighbor)
+				stack.append(neighbor)
+	return pre_order, children
+
+
+def _introduce(crossing_graph: nx.Graph, bag: tuple) -> dict[tuple, list]:
+	"""
+	Builds the table of a bag by introducing its vertices one after another, starting with the empty colouring.
+	Colourings that put two adjacent vertices into the same set are discarded as soon as the second vertex is added.
+	"""
+	table = {(): [(0, 0, None)]}
+	for k, v in enumerate(bag):
+		neighbor_positions = [i for i in range(k) if crossing_graph.has_edge(bag[i], v)]
+		extended = dict()
+		for coloring, front in table.items():
+			extended[coloring + (0,)] = front
+			for color in (1, 2):
+				if all(coloring[i] != color for i in neighbor_positions):
+					leaf = _Colored(v, color)
+					extended[coloring + (color,)] = [
+						(a + (color == 1), b + (color == 2), leaf if back is None else (back, leaf)) for a, b, back in front
+					]
+		table = extended
+	return table
+
+
+def _forget(table: dict[tuple, list], bag: tuple, kept: tuple) -> dict[tuple, list]:
+	"""
+	Projects the colourings of a table onto the kept vertices and merges the fronts of colourings with the same
+	projection. The sizes of the merged fronts no longer count the kept vertices, so that joining them into the table of
+	a bag that contains the kept vertices counts every vertex once.
+	"""
+	positions = [bag.index(v) for v in kept]
+	grouped = dict()
+	for coloring, front in table.items():
+		grouped.setdefault(tuple(coloring[i] for i in positions), []).extend(front)
+
+	forgotten = dict()
+	for projection, front in grouped.items():
+		shared_1 = projection.count(1)
+		shared_2 = projection.count(2)
+		forgotten[projection] = pareto_front([(a - shared_1, b - shared_2, back) for a, b, back in front])
+	return forgotten
+
+
+def _join(table: dict[tuple, list], bag: tuple, child_table: dict[tuple, list], shared: tuple) -> dict[tuple, list]:
+	"""
+	Joins a forgotten child table into the table of a bag. Every colouring of the bag is combined with the front of the
+	child colourings that agree with it on the shared vertices.
+	"""
+	positions = [bag.index(v) for v in shared]
+	joined = dict()
+	for coloring, front in table.items():
+		child_front = child_table.get(tuple(coloring[i] for i in positions))
+		if child_front is not None:
+			joined[coloring] = pareto_sum(front, child_front)
+	return joined
+
+
+def _introduce_dense(crossing_graph: nx.Graph, bag: tuple) -> dict[tuple, np.ndarray]:
+	table = {(): np.array([0])}
+	for k, v in enumerate(bag):
+		neighbor_positions = [i for i in range(k) if crossing_graph.has_edge(bag[i], v)]
+		extended = dict()
+		for coloring, front in table.items():
+			extended[coloring + (0,)] = front
+			if all(coloring[i] != 1 for i in neighbor_positions):
+				extended[coloring + (1,)] = np.concatenate(([_INFEASIBLE], front))
+			if all(coloring[i] != 2 for i in neighbor_positions):
+				extended[coloring + (2,)] = np.where(front >= 0, front + 1, _INFEASIBLE)
+		table = extended
+	return table
+
+
+def _forget_dense(table: dict[tuple, np.ndarray], bag: tuple, kept: tuple) -> (dict, dict):
+	"""
+	The dense version of _forget. Additionally returns, for every projection, the merged colourings and for every a the
+	index of the colouring that attains the largest b.
+	"""
+	positions = [bag.index(v) for v in kept]
+	grouped = dict()
+	for coloring, front in table.items():
+		grouped.setdefault(tuple(coloring[i] for i in positions), []).append(coloring)
+
+	forgotten = dict()
+	origin = dict()
+	for projection, colorings in grouped.items():
+		shared_1 = projection.count(1)
+		shared_2 = projection.count(2)
+		shifted = [np.where(table[c][shared_1:] >= 0, table[c][shared_1:] - shared_2, _INFEASIBLE) for c in colorings]
+		forgotten[projection], best_coloring = _elementwise_best(shifted, range(len(colorings)))
+		origin[projection] = (colorings, best_coloring)
+	return forgotten, origin
+
+
+def _elementwise_best(fronts: list[np.ndarray], indices) -> (np.ndarray, np.ndarray):
+	"""
+	Returns the elementwise maximum of the dense fronts with the given indices and, for every a, the index of the front
+	that attains it.
+	"""
+	indices = list(indices)
+	length = max(len(fronts[i]) for i in indices)
+	stacked = np.full((len(indices), length), _INFEASIBLE, dtype=np.int64)
+	for row, i in enumerate(indices):
+		stacked[row, :len(fronts[i])] = fronts[i]
+	best_row = np.argmax(stacked, axis=0)
+	return stacked[best_row, np.arange(length)], np.asarray(indices)[best_row]
+
+
+def _best_entry(fronts: list[np.ndarray]) -> (int, int):
+	"""
+	Returns the index of the dense front and the a of the entry that maximizes min(a, b) and then max(a, b).
+	"""
+	best = None
+	best_key = None
+	for i, front in enumerate(fronts):
+		a = np.flatnonzero(front >= 0)
+		b = front[a]
+		keys = np.minimum(a, b) * (len(front) + int(b.max(initial=0)) + 1) + np.maximum(a, b)
+		if len(keys) and (best_key is None or keys.max() > best_key):
+			best_key = int(keys.max())
+			best = (i, int(a[np.argmax(keys)]))
+	return best
+
+
+def max_plus_convolution(f: np.ndarray, g: np.ndarray) -> (np.ndarray, np.ndarray):
+	"""
+	Combines two dense Pareto fronts, where f[a] is the largest b of an entry with first value a (or a negative value
+	if there is none). The result is h[c] = max(f[a] + g[c - a]), the (max, +) convolution of f and g, together with
+	the c - a that attains the maximum, so that the entries can be traced back.
+
+	The loop runs over the feasible entries of the shorter front and handles the other one with NumPy, so combining a
+	small parent front with a large child front is cheap.
+	"""
+	h = np.full(len(f) + len(g) - 1, _INFEASIBLE, dtype=np.int64)
+	split = np.zeros(len(h), dtype=np.int32)
+	if len(f) <= len(g):
+		for a in np.flatnonzero(f >= 0).tolist():
+			candidate = g + f[a]
+			window = h[a:a + len(g)]
+			better = candidate > window
+			window[better] = candidate[better]
+			split[a:a + len(g)][better] = np.flatnonzero(better)
+	else:
+		for b in np.flatnonzero(g >= 0).tolist():
+			candidate = f + g[b]
+			window = h[b:b + len(f)]
+			better = candidate > window
+			window[better] = candidate[better]
+			split[b:b + len(f)][better] = b
+	h[h < 0] = _INFEASIBLE
+	return h, split
+
+
+def pareto_sum(l1: list[tuple[int, int, Any]], l2: list[tuple[int, int, Any]]) -> list[tuple[int, int, Any]]:
+	"""
+	Combines two Pareto fronts of (a, b, back-pointer) entries: all pairwise sums are sorted and the dominated ones are
+	pruned. The back-pointer of a sum refers to the back-pointers of both summands, so no vertex sets are built.
+	"""
 	l = []
 
-	for p1 in l1:
-		a1, b1, c1 = p1
-		for p2 in l2:
-			a2, b2, c2 = p2
-			l.append([a1 + a2, b1 + b2, [c1[0] | c2[0], c1[1] | c2[1]]])
+	for a1, b1, back1 in l1:
+		for a2, b2, back2 in l2:
+			if back1 is None:
+				back = back2
+			elif back2 is None:
+				back = back1
+			else:
+				back = (back1, back2)
+			l.append((a1 + a2, b1 + b2, back))
+
+	return pareto_front(l)
+
+
+def pareto_front(l: list[tuple[int, int, Any]]) -> list[tuple[int, int, Any]]:
+	"""
+	Removes the dominated entries of a list of (a, b, back-pointer) entries and sorts the rest by decreasing a.
+	"""
+	if not l:
+		return l
 
-	l.sort(reverse=True)
+	l.sort(key=itemgetter(0, 1), reverse=True)
 
 	pareto = [l[0]]
 
@@ -215,3 +680,29 @@ def pareto_sum(l1: list[list[int, int, list]], l2: list[list[int, int, list]]) -
 			pareto.append(p)
 
 	return pareto
+
+
+class _Colored(NamedTuple):
+	"""
+	A leaf of a back-pointer: the vertex belongs to the first (color 1) or the second (color 2) set. Every other
+	back-pointer is None or a tuple of back-pointers.
+	"""
+	vertex: Any
+	color: int
+
+
+def trace_sets(back) -> (set, set):
+	"""
+	Collects the two vertex sets that a back-pointer of a Pareto front entry refers to.
+	"""
+	sets = (set(), set())
+	stack = [back]
+	while stack:
+		back = stack.pop()
+		if back is None:
+			continue
+		if isinstance(back, _Colored):
+			sets[back.color - 1].add(back.vertex)
+		else:
+			stack.extend(back)
+	return sets
@@ -1,45 +1,279 @@
 from frame import *
-import gurobipy as gp
+from time import perf_counter
+from typing import NamedTuple
 import networkx as nx
+import numpy as np
+import scipy.sparse as sp
 from collections import UserList
+from heapq import heappop, heappush
+
+try:
+    import gurobipy as gp
+except ImportError:
+    # Only the "gurobi" solver needs gurobipy.
+    gp = None
+
+SOLVERS = ("gurobi", "cp-sat")
+PLANARITY = ("edges", "cliques")
 
 
 class ILPResult(UserList):
     """
     A wrapper for the result of the ILP. This wrapper behaves like the normal list[FrameEvent] return type, but
     also offers additional information about the solution, i.e., whether it is optimal and if not, what the best
-    bound or optimality gap is.
+    bound or optimality gap is. The gap is |best_bound - objective_value| / |objective_value| for every solver (0 if
+    both are equal, infinite if only the objective value is 0).
     """
     objective_value: float
     best_bound: float
     gap: float
     time_limit_seconds: int
+    num_frames: int | None
+    """
+    The number of frames of the (last) model that was solved.
+    """
 
     def __init__(self, frame_events: list[FrameEvent], objective_value: float, best_bound: float, gap: float,
-                 time_limit_seconds: int):
+                 time_limit_seconds: int, num_frames: int | None = None):
         super().__init__(frame_events)
         self.objective_value = objective_value
         self.best_bound = best_bound
         self.gap = gap
         self.time_limit_seconds = time_limit_seconds
+        self.num_frames = num_frames
 
 
 def compute_frames_max_min(crossing_graph: nx.Graph, num_frames: int = None, frame_events:[] = None, frames:[] = None,
-                           verbose: bool = True, max_time_seconds: int | None = None) -> ILPResult:
+                           verbose: bool = True, max_time_seconds: int | None = None, horizon: str = "vertices",
+                           iterate_horizon: bool = False, symmetry_breaking: bool = False, solver: str = "gurobi",
+                           threads: int | None = None, planarity: str = "edges",
+                           separate_cuts: bool = False) -> ILPResult:
     """
     Integer linear program for computing an edge story that maximizes the minimum number of edges in a frame.
 
+    Frames without a new edge only remove edges, so every story can be turned into one that is at least as good and
+    inserts exactly one edge in every frame but the first, followed by copies of its last frame. A story with k such
+    frames starts with n - k + 1 edges (n = number of vertices of the conflict graph), so its minimum is at most
+    n - k + 1. This allows the following horizons:
+
+    - "vertices": num_frames = n, which always contains an optimal story.
+    - "bound": num_frames = n - L + 1, where L is the objective of the warm start. This still contains an optimal story.
+    - "warm_start": num_frames = the number of frames of the warm start. Stories with more frames have a minimum of at
+      most n - num_frames, so the best bound is max(bound of the model, n - num_frames). If iterate_horizon is True and
+      this is larger than the objective, the model is solved once more with num_frames = n - objective + 1, warm
+      started with the first solution, which settles the bound.
+
     :param crossing_graph: The conflict graph of the graph drawing whose edge story is generated.
-    :param num_frames: The number of frames to generate. If num_frames = None, then the number of edges in the graph
-    drawing, i.e., the number of vertices in the crossing_graph is used.
+    :param num_frames: The number of frames to generate. If num_frames = None, it is chosen according to horizon.
+    :param frame_events: The frame events of a feasible solution that is used as a warm start.
+    :param frames: The frames of the warm start. This can also be an iterator like FrameEvent.iter_crossing_frames.
     :param verbose: Set the verbosity of the ILP solver.
+    :param horizon: "vertices", "bound" or "warm_start", see above. The latter two need a warm start.
+    :param iterate_horizon: Whether to solve a second model with a larger horizon if the first one is not long enough
+    to prove its solution optimal.
+    :param symmetry_breaking: Whether to add symmetry_breaking_constraints. They often slow Gurobi down, so they are
+    off by default.
+    :param solver: "gurobi" or "cp-sat" (OR-Tools). Both solve the same MaxMinFormulation.
+    :param threads: The number of threads of the solver. If threads = None, the solver's default is used, which is all
+    cores for both solvers.
+    :param planarity: "edges" for one row x[e, t] + x[f, t] <= 1 per conflict edge and frame, or "cliques" for one row
+    per clique of conflict_clique_cover and frame, see planarity_constraints.
+    :param separate_cuts: Whether to separate violated clique and odd-cycle inequalities of the LP relaxation in a
+    callback, see PlanarityCutSeparator. Only the solver "gurobi" supports callbacks.
 
     :returns: A list of frame events representing an optimal solution of the edge story of the graph represented by the
     conflict graph.
     """
-
+    if horizon not in ("vertices", "bound", "warm_start"):
+        raise ValueError(f"Unknown horizon {horizon}, expected 'vertices', 'bound' or 'warm_start'")
+    if solver not in SOLVERS:
+        raise ValueError(f"Unknown solver {solver}, expected one of {', '.join(SOLVERS)}")
+    if planarity not in PLANARITY:
+        raise ValueError(f"Unknown planarity {planarity}, expected one of {', '.join(PLANARITY)}")
+    if separate_cuts and solver != "gurobi":
+        raise ValueError(f"The solver {solver} does not support separate_cuts")
+
+    num_vertices = len(crossing_graph.nodes)
     if num_frames is None:
-        num_frames = len(crossing_graph.nodes)
+        num_frames = num_vertices
+        if frame_events and horizon != "vertices":
+            sizes, warm_start_objective, _ = FrameEvent.frame_sizes(frame_events)
+            num_frames = len(sizes) if horizon == "warm_start" else num_vertices - warm_start_objective + 1
+            num_frames = max(1, min(num_frames, num_vertices))
+
+    t1 = perf_counter()
+    options = dict(symmetry_breaking=symmetry_breaking, solver=solver, threads=threads, planarity=planarity,
+                   separate_cuts=separate_cuts)
+    result = _solve_max_min(crossing_graph, num_frames, frame_events, frames, verbose, max_time_seconds, **options)
+
+    if iterate_horizon and len(result) and num_vertices - num_frames > result.objective_value:
+        larger_num_frames = min(num_vertices - int(result.objective_value) + 1, num_vertices)
+        remaining_seconds = None if max_time_seconds is None else max_time_seconds - (perf_counter() - t1)
+        if larger_num_frames > num_frames and (remaining_seconds is None or remaining_seconds > 0):
+            result = _solve_max_min(crossing_graph, larger_num_frames, list(result),
+                                    FrameEvent.iter_crossing_frames(result), verbose, remaining_seconds, **options)
+            result.time_limit_seconds = max_time_seconds
+
+    return result
+
+
+def _solve_max_min(crossing_graph: nx.Graph, num_frames: int, frame_events: [], frames: [], verbose: bool,
+                   max_time_seconds: float | None, symmetry_breaking: bool, solver: str, threads: int | None,
+                   planarity: str, separate_cuts: bool) -> ILPResult:
+    formulation = max_min_formulation(crossing_graph, num_frames, symmetry_breaking, planarity)
+
+    # Giving an initial feasible solution to the ILP
+    start = formulation.start_vector(frame_events, frames) if frame_events and frames else None
+
+    if solver == "gurobi":
+        separator = PlanarityCutSeparator(crossing_graph) if separate_cuts else None
+        output = _solve_gurobi(formulation, start, verbose, max_time_seconds, threads, separator)
+    else:
+        output = _solve_cp_sat(formulation, start, verbose, max_time_seconds, threads)
+
+    frame_events = formulation.story(output.values) if output.values is not None else []
+    # The story can be better than min_var, e.g., if it ends before the horizon.
+    objective_value = FrameEvent.frame_sizes(frame_events)[1] if frame_events else output.objective
+
+    # The objective is integral, so the bound of the solver can be rounded down (up to its tolerance). Stories with
+    # more frames than the horizon start with at most n - num_frames edges.
+    bound = int(np.floor(output.bound + 1e-6)) if np.isfinite(output.bound) else output.bound
+    best_bound = max(bound, len(crossing_graph.nodes) - num_frames)
+    return ILPResult(frame_events=frame_events, objective_value=objective_value, best_bound=best_bound,
+                     gap=_gap(objective_value, best_bound), time_limit_seconds=max_time_seconds,
+                     num_frames=num_frames)
+
+
+def _gap(objective: float, bound: float) -> float:
+    # Without a solution, the objective is NaN and the gap is infinite.
+    if np.isnan(objective):
+        return float("inf")
+    if objective == bound:
+        return 0.0
+    return abs(bound - objective) / abs(objective) if objective else float("inf")
+
+
+class _SolverOutput(NamedTuple):
+    values: np.ndarray | None
+    objective: float
+    bound: float
+
+
+class ConstraintBlock(NamedTuple):
+    """
+    The linear constraints matrix @ v <= rhs, >= rhs or == rhs (sense "<", ">" or "=") over the variables v of a
+    MaxMinFormulation.
+    """
+    matrix: sp.csr_array
+    sense: str
+    rhs: np.ndarray
+
+
+class MaxMinFormulation:
+    """
+    The ILP for an edge story that maximizes the minimum number of edges in a frame, independent of a solver. The naming
+    convention is based on the formulation of the paper. All variables form one vector v = (x, z, min_var):
+
+    - x[i, t] = v[i * num_frames + t] = 1 signifies that edge i (in the order of crossing_graph.nodes) is present in
+      frame t,
+    - z[i, t] = v[num_x + i * num_frames + t] = 1 means that edge i appears in frame t, and
+    - min_var = v[2 * num_x] is the minimum number of edges in any frame, which is maximized.
+
+    :param nodes: The vertices of the conflict graph.
+    :param num_frames: The number of frames.
+    :param blocks: The constraints.
+    :param min_upper_bound: The upper bound of min_var. It must hold for every story, independent of the number of
+        frames, otherwise the model cannot represent stories whose frames are all larger than the horizon.
+    """
+    nodes: list
+    num_frames: int
+    blocks: list[ConstraintBlock]
+    min_upper_bound: int
+
+    def __init__(self, nodes: list, num_frames: int, blocks: list[ConstraintBlock], min_upper_bound: int):
+        self.nodes = nodes
+        self.num_frames = num_frames
+        self.blocks = blocks
+        self.min_upper_bound = min_upper_bound
+
+    @property
+    def num_x(self) -> int:
+        return len(self.nodes) * self.num_frames
+
+    @property
+    def num_variables(self) -> int:
+        return 2 * self.num_x + 1
+
+    def start_vector(self, frame_events: [FrameEvent], frames) -> np.ndarray:
+        """
+        Returns the variables of a feasible story. The last frame is repeated until the horizon, like in a story that
+        does not insert edges anymore.
+
+        :param frame_events: The frame events of the story.
+        :param frames: The frames of the story. This can also be an iterator like FrameEvent.iter_crossing_frames.
+        """
+        node_index = {e: i for i, e in enumerate(self.nodes)}
+        x_start = np.zeros((len(self.nodes), self.num_frames))
+        z_start = np.zeros((len(self.nodes), self.num_frames))
+
+        index = -1
+        for index, graph in enumerate(frames):
+            if index >= self.num_frames:
+                break
+            x_start[[node_index[e] for e in graph.nodes], index] = 1
+        if 0 <= index < self.num_frames - 1:
+            x_start[:, index + 1:] = x_start[:, [index]]
+
+        for frame_event in frame_events:
+            if frame_event.frame_type == FrameEventType.IN and frame_event.time < self.num_frames:
+                z_start[node_index[frame_event.edge], frame_event.time] = 1
+
+        min_start = min(x_start.sum(axis=0).min(initial=0), self.min_upper_bound)
+        return np.concatenate((x_start.reshape(-1), z_start.reshape(-1), [min_start]))
+
+    def story(self, values: np.ndarray) -> list[FrameEvent]:
+        """
+        Returns the sorted frame events of a solution.
+        """
+        shape = (len(self.nodes), self.num_frames)
+        x_values = values[:self.num_x].reshape(shape) > 0.5
+        z_values = values[self.num_x:2 * self.num_x].reshape(shape) > 0.5
+
+        in_rows, in_times = np.nonzero(z_values)
+        frame_events = [FrameEvent(self.nodes[i], t, FrameEventType.IN)
+                        for i, t in zip(in_rows.tolist(), in_times.tolist())]
+
+        # The last frame in which an edge is present, every edge is present in at least one frame.
+        last_present = self.num_frames - 1 - np.argmax(x_values[:, ::-1], axis=1)
+        frame_events.extend(FrameEvent(e, t + 1, FrameEventType.OUT) for e, t in zip(self.nodes, last_present.tolist()))
+
+        frame_events = sorted(frame_events)
+
+        while frame_events and frame_events[-1].frame_type == FrameEventType.OUT:
+            frame_events.pop()
+        return frame_events
+
+
+def max_min_formulation(crossing_graph: nx.Graph, num_frames: int, symmetry_breaking: bool = False,
+                        planarity: str = "edges") -> MaxMinFormulation:
+    cliques = conflict_clique_cover(crossing_graph) if planarity == "cliques" else None
+    blocks = (planarity_constraints(crossing_graph, num_frames, cliques)
+              + edge_existence_constraints(crossing_graph, num_frames)
+              + min_number_of_edges_in_frames_constraints(crossing_graph, num_frames)
+              + continuity_constraints(crossing_graph, num_frames))
+    if symmetry_breaking:
+        blocks += symmetry_breaking_constraints(crossing_graph, num_frames)
+    # Every frame is an independent set, whose size is at most n - |M| for a maximal matching M. The bound is implied,
+    # but it tightens the relaxation.
+    min_upper_bound = len(crossing_graph.nodes) - len(nx.maximal_matching(crossing_graph))
+    return MaxMinFormulation(list(crossing_graph.nodes), num_frames, blocks, min_upper_bound)
+
+
+def _solve_gurobi(formulation: MaxMinFormulation, start: np.ndarray | None, verbose: bool,
+                  max_time_seconds: float | None, threads: int | None,
+                  separator: "PlanarityCutSeparator | None" = None) -> _SolverOutput:
+    if gp is None:
+        raise ImportError("The solver 'gurobi' needs gurobipy")
 
     with gp.Env(empty=True) as env:
         if not verbose:
@@ -49,26 +283,22 @@ def compute_frames_max_min(crossing_graph: nx.Graph, num_frames: int = None, fra
         with gp.Model(env=env) as model:
             if max_time_seconds is not None:
                 model.setParam('TimeLimit', max_time_seconds)
-
-            x_vars, z_vars, min_var = add_variables(crossing_graph, model, num_frames)
-
-            add_planarity_constraints(crossing_graph, model, num_frames, x_vars)
-            add_edge_existence_constraints(crossing_graph, model, num_frames, x_vars)
-            add_min_number_of_edges_in_frames_constraints(crossing_graph, model, num_frames, x_vars, min_var)
-            add_continuity_constraints(crossing_graph, model, num_frames, x_vars, z_vars)
-            # This is implied, but I think it makes it a bit faster
-            model.addConstr(min_var <= len(crossing_graph.nodes)/2)
-
-            # Giving an initial feasible solution to the ILP
-            if frame_events and frames:
-                for index, graph in enumerate(frames):
-                    for node in graph.nodes:
-                        x_vars[node, index].Start = 1
-
-                for frame_event in frame_events:
-                    if frame_event.frame_type == FrameEventType.IN:
-                        z_vars[frame_event.edge, frame_event.time].Start = 1
-
+            if threads is not None:
+                model.setParam('Threads', threads)
+
+            shape = (len(formulation.nodes), formulation.num_frames)
+            x_vars = model.addMVar(shape, vtype=gp.GRB.BINARY, name="x")
+            z_vars = model.addMVar(shape, vtype=gp.GRB.BINARY, name="z")
+            # min_var is integral like in the CP-SAT model, so both solvers report the same objective and bound.
+            min_var = model.addMVar(1, vtype=gp.GRB.INTEGER, name="min_var", lb=0, ub=formulation.min_upper_bound)
+            variables = gp.hstack((x_vars.reshape(-1), z_vars.reshape(-1), min_var))
+
+            for block in formulation.blocks:
+                model.addMConstr(block.matrix, variables, block.sense, block.rhs)
+
+            if start is not None:
+                x_vars.Start = start[:formulation.num_x].reshape(shape)
+                z_vars.Start = start[formulation.num_x:2 * formulation.num_x].reshape(shape)
                 model.update()
 
             # objective function that aims to reduce symmetric solutions.
@@ -77,7 +307,7 @@ def compute_frames_max_min(crossing_graph: nx.Graph, num_frames: int = None, fra
             #     min_var - (1/(num_frames*num_frames+1))*gp.quicksum((t+1)*gp.quicksum(z_vars[e, t] for e in crossing_graph.nodes)
             #                for t in range(num_frames)), gp.GRB.MAXIMIZE)
 
-            model.setObjective(min_var, gp.GRB.MAXIMIZE)
+            model.setObjective(min_var.sum(), gp.GRB.MAXIMIZE)
 
             # Gurobi Parameters
             # model.setParam("MIPFocus", 3)
@@ -85,60 +315,340 @@ def compute_frames_max_min(crossing_graph: nx.Graph, num_frames: int = None, fra
             # model.setParam("Heuristics", 0.01)
             # model.setParam("Symmetry", 2)
 
-            model.optimize()
-
-            if model.SolCount== 0:
-                frame_events = []
+            if separator is None:
+                model.optimize()
+            else:
+                # The cuts refer to the original variables, PreCrush lets Gurobi translate them to the presolved model.
+                model.setParam('PreCrush', 1)
+                x_list = x_vars.reshape(-1).tolist()
+                num_frames = formulation.num_frames
+
+                def callback(callback_model, where):
+                    if (where != gp.GRB.Callback.MIPNODE
+                            or callback_model.cbGet(gp.GRB.Callback.MIPNODE_STATUS) != gp.GRB.OPTIMAL):
+                        return
+                    for vertices, t, rhs in separator.separate(callback_model.cbGetNodeRel(x_vars)):
+                        callback_model.cbCut(gp.quicksum(x_list[i * num_frames + t] for i in vertices) <= rhs)
+
+                model.optimize(callback)
+
+            if model.SolCount == 0:
+                return _SolverOutput(None, float("nan"), model.ObjBound)
+            # One bulk query for all variables.
+            return _SolverOutput(variables.X, model.ObjVal, model.ObjBound)
+
+
+def _solve_cp_sat(formulation: MaxMinFormulation, start: np.ndarray | None, verbose: bool,
+                  max_time_seconds: float | None, threads: int | None) -> _SolverOutput:
+    # OR-Tools is only imported when it is used, since it ships its own copy of HiGHS.
+    from ortools.sat.python import cp_model
+
+    model = cp_model.CpModel()
+    variables = [model.NewBoolVar("") for _ in range(2 * formulation.num_x)]
+    variables.append(model.NewIntVar(0, formulation.min_upper_bound, "min_var"))
+
+    for block in formulation.blocks:
+        matrix = block.matrix
+        indices, data = matrix.indices.tolist(), matrix.data.astype(np.int64).tolist()
+        for row, (begin, end) in enumerate(zip(matrix.indptr[:-1].tolist(), matrix.indptr[1:].tolist())):
+            expression = cp_model.LinearExpr.WeightedSum([variables[j] for j in indices[begin:end]], data[begin:end])
+            rhs = int(block.rhs[row])
+            if block.sense == "<":
+                model.Add(expression <= rhs)
+            elif block.sense == ">":
+                model.Add(expression >= rhs)
             else:
-                frame_events = [FrameEvent(e, t, FrameEventType.IN) for (e, t) in z_vars.keys() if z_vars[e, t].X == 1]
+                model.Add(expression == rhs)
+
+    model.Maximize(variables[-1])
+    if start is not None:
+        for variable, value in zip(variables, np.rint(start).astype(np.int64).tolist()):
+            model.AddHint(variable, value)
+
+    solver = cp_model.CpSolver()
+    if max_time_seconds is not None:
+        solver.parameters.max_time_in_seconds = max_time_seconds
+    if threads is not None:
+        solver.parameters.num_workers = threads
+    solver.parameters.log_search_progress = verbose
+
+    status = solver.Solve(model)
+    if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+        return _SolverOutput(None, float("nan"), solver.BestObjectiveBound())
+    # The solution of the response lists the values of all variables in the order of their creation.
+    return _SolverOutput(np.asarray(solver.ResponseProto().solution, dtype=np.float64), solver.ObjectiveValue(),
+                         solver.BestObjectiveBound())
+
 
-                for e in crossing_graph.nodes:
-                    frame_events.append(
-                        FrameEvent(e, max(t for t in range(num_frames) if x_vars[e, t].X == 1)+1, FrameEventType.OUT)
-                    )
+def conflict_edge_array(crossing_graph: nx.Graph) -> np.ndarray:
+    """
+    Returns the edges of the conflict graph as an (m, 2) array of the indices of their end vertices in
+    crossing_graph.nodes.
+    """
+    node_index = {e: i for i, e in enumerate(crossing_graph.nodes)}
+    return np.fromiter((node_index[e] for edge in crossing_graph.edges for e in edge), dtype=np.int64,
+                       count=2 * crossing_graph.number_of_edges()).reshape(-1, 2)
+
+
+def planarity_constraints(crossing_graph: nx.Graph, num_frames: int,
+                          cliques: list[list[int]] | None = None) -> list[ConstraintBlock]:
+    """
+    x[e, t] + x[f, t] <= 1 for every conflict edge ef and every frame t. Row k * num_frames + t belongs to the k-th
+    conflict edge and frame t.
+
+    If cliques is given, the rows are sum_{e in C} x[e, t] <= 1 for every clique C and frame t instead. If the cliques
+    cover all conflict edges, like the ones of conflict_clique_cover, they imply the rows of the conflict edges, have a
+    tighter LP relaxation and are fewer on dense conflict graphs. There is one block per clique size, in which row
+    k * num_frames + t belongs to the k-th clique of this size and frame t.
+    """
+    if cliques is None:
+        edges = conflict_edge_array(crossing_graph)
+        cliques_by_size = {2: edges} if len(edges) else {}
+    else:
+        cliques_by_size = dict()
+        for clique in cliques:
+            cliques_by_size.setdefault(len(clique), []).append(sorted(clique))
+
+    blocks = []
+    for size, vertices in sorted(cliques_by_size.items()):
+        vertices = np.asarray(vertices, dtype=np.int64).reshape(-1, size)
+        clique, frame = np.divmod(np.arange(len(vertices) * num_frames), num_frames)
+        columns = np.sort(vertices[clique] * num_frames + frame[:, None], axis=1)
+        blocks.append(_block(columns, np.ones(size), "<", 1, crossing_graph, num_frames))
+    return blocks
+
+
+def conflict_clique_cover(crossing_graph: nx.Graph) -> list[list[int]]:
+    """
+    Covers the edges of the conflict graph greedily with cliques: while a vertex u has an uncovered conflict edge uv,
+    the clique {u, v} is extended by the common neighbour that covers the most uncovered edges with the clique, until it
+    is maximal. Drawing edges that pairwise cross, like the ones crossing a segment in the same direction near a common
+    point, end up in one clique.
 
-                frame_events = sorted(frame_events)
+    :param crossing_graph: The conflict graph.
+    :returns: The cliques as lists of indices in crossing_graph.nodes. Every conflict edge is contained in a clique.
+    """
+    node_index = {e: i for i, e in enumerate(crossing_graph.nodes)}
+    adjacency = [set() for _ in node_index]
+    for e, f in crossing_graph.edges:
+        if e != f:
+            adjacency[node_index[e]].add(node_index[f])
+            adjacency[node_index[f]].add(node_index[e])
+    uncovered = [set(neighbors) for neighbors in adjacency]
+
+    cliques = []
+    for u in range(len(adjacency)):
+        while uncovered[u]:
+            v = min(uncovered[u])
+            clique = [u, v]
+            candidates = adjacency[u] & adjacency[v]
+            while candidates:
+                w = max(candidates, key=lambda c: (sum(1 for a in clique if a in uncovered[c]), -c))
+                clique.append(w)
+                candidates &= adjacency[w]
+            for a in clique:
+                uncovered[a].difference_update(clique)
+            cliques.append(sorted(clique))
+    return cliques
+
+
+def edge_existence_constraints(crossing_graph: nx.Graph, num_frames: int) -> list[ConstraintBlock]:
+    """
+    sum_t x[e, t] >= 1 for every edge e.
+    """
+    columns = _x_columns(crossing_graph, num_frames)
+    return [_block(columns, np.ones(num_frames), ">", 1, crossing_graph, num_frames)]
 
-                while frame_events[-1].frame_type == FrameEventType.OUT:
-                    frame_events.pop()
 
-            return ILPResult(frame_events=frame_events, objective_value=model.Objval, best_bound=model.ObjBound,
-                             gap=model.MIPGap, time_limit_seconds=max_time_seconds)
+def min_number_of_edges_in_frames_constraints(crossing_graph: nx.Graph, num_frames: int) -> list[ConstraintBlock]:
+    """
+    sum_e x[e, t] - min_var >= 0 for every frame t.
+    """
+    num_x = len(crossing_graph.nodes) * num_frames
+    columns = np.hstack((_x_columns(crossing_graph, num_frames).T, np.full((num_frames, 1), 2 * num_x)))
+    return [_block(columns, np.append(np.ones(len(crossing_graph.nodes)), -1), ">", 0, crossing_graph, num_frames)]
 
 
-def add_variables(crossing_graph: nx.Graph, model: gp.Model, num_frames: int):
+def continuity_constraints(crossing_graph: nx.Graph, num_frames: int) -> list[ConstraintBlock]:
+    """
+    Every edge appears exactly once (sum_t z[e, t] = 1), it can only be present in a frame if it was present in the
+    previous frame or appears (x[e, t-1] - x[e, t] + z[e, t] >= 0 and z[e, 0] - x[e, 0] >= 0), and at most one edge
+    appears in every frame but the first.
+    """
+    num_x = len(crossing_graph.nodes) * num_frames
+    x_columns = _x_columns(crossing_graph, num_frames)
+    z_columns = x_columns + num_x
+
+    blocks = [_block(z_columns, np.ones(num_frames), "=", 1, crossing_graph, num_frames),
+              _block(np.stack((x_columns[:, 0], z_columns[:, 0]), axis=1), [-1, 1], ">", 0, crossing_graph,
+                     num_frames)]
+    if num_frames > 1:
+        columns = np.stack((x_columns[:, :-1].reshape(-1), x_columns[:, 1:].reshape(-1), z_columns[:, 1:].reshape(-1)),
+                           axis=1)
+        blocks.append(_block(columns, [1, -1, 1], ">", 0, crossing_graph, num_frames))
+        blocks.append(_block(z_columns[:, 1:].T, np.ones(len(crossing_graph.nodes)), "<", 1, crossing_graph,
+                             num_frames))
+    return blocks
+
+
+def symmetry_breaking_constraints(crossing_graph: nx.Graph, num_frames: int) -> list[ConstraintBlock]:
     """
-    Returns the necessary variables for the ILP formulation. The naming convention is based on the formulation of the
-    paper. A binary variable x_var[e, t] = 1 signifies that edge e is present in frame t. The binary variable
-    z_var[e, t] = 1 means that edge e appears in frame t. The continuous variable min_var serves as a linearization of
-    the objective function min_var represents the minimum number of edges in any frame.
+    Frames without a new edge can be moved to the end of a story, so the frames that insert an edge form a prefix of
+    frames 1, ..., num_frames - 1: sum_e z[e, t] - sum_e z[e, t+1] >= 0.
     """
+    if num_frames <= 2:
+        return []
 
-    x_vars = model.addVars(((e, t) for e in crossing_graph.nodes for t in range(num_frames)),
-                           vtype=gp.GRB.BINARY, name="x")
-    z_vars = model.addVars(((e, t) for e in crossing_graph.nodes for t in range(num_frames)),
-                           vtype=gp.GRB.BINARY, name="z")
-    min_var = model.addVar(vtype=gp.GRB.CONTINUOUS, name="min_var", lb=0, ub=num_frames)
+    z_columns = _x_columns(crossing_graph, num_frames) + len(crossing_graph.nodes) * num_frames
+    # For every frame t, the columns z[e, t] and z[e, t+1] of all edges e alternate and are sorted.
+    columns = np.stack((z_columns[:, 1:-1].T, z_columns[:, 2:].T), axis=2).reshape(num_frames - 2, -1)
+    values = np.tile([1, -1], len(crossing_graph.nodes))
+    return [_block(columns, values, ">", 0, crossing_graph, num_frames)]
 
-    return x_vars, z_vars, min_var
+
+def _x_columns(crossing_graph: nx.Graph, num_frames: int) -> np.ndarray:
+    """
+    Returns the (n, num_frames) matrix of the indices of the variables x[i, t] in the variable vector.
+    """
+    return np.arange(len(crossing_graph.nodes) * num_frames).reshape(-1, num_frames)
 
 
-def add_planarity_constraints(crossing_graph: nx.Graph, model: gp.Model, num_frames: int, x_vars):
-    model.addConstrs(x_vars[e, t] + x_vars[f, t] <= 1 for e, f in crossing_graph.edges for t in range(num_frames))
+def _block(columns: np.ndarray, values, sense: str, rhs: float, crossing_graph: nx.Graph,
+           num_frames: int) -> ConstraintBlock:
+    """
+    Builds a block whose i-th row has the entries values at the sorted column indices columns[i]. The CSR matrix is
+    built directly, without sorting the entries like the COO constructor.
+    """
+    num_rows, row_length = columns.shape
+    num_variables = 2 * len(crossing_graph.nodes) * num_frames + 1
+    matrix = sp.csr_array((np.tile(np.asarray(values, dtype=np.float64), num_rows), columns.reshape(-1),
+                           np.arange(0, num_rows * row_length + 1, row_length)), shape=(num_rows, num_variables))
+    return ConstraintBlock(matrix, sense, np.full(num_rows, rhs, dtype=np.float64))
 
 
-def add_edge_existence_constraints(crossing_graph: nx.Graph, model: gp.Model, num_frames: int, x_vars):
-    model.addConstrs(gp.quicksum(x_vars[e, t] for t in range(num_frames)) >= 1 for e in crossing_graph.nodes)
+class PlanarityCutSeparator:
+    """
+    Separates inequalities of the x variables of a frame that the LP relaxation violates. Each of them holds for the
+    independent set of every frame:
 
+    - clique inequalities sum_{e in C} x[e, t] <= 1 for a clique C of the conflict graph, found greedily among the
+      vertices with positive value, in decreasing order of value, and extended to a maximal clique, and
+    - odd-cycle inequalities sum_{e in C} x[e, t] <= (|C| - 1) / 2 for an odd cycle C of the conflict graph. With the
+      weights 1 - x[e, t] - x[f, t] of the conflict edges ef, such an inequality is violated if and only if the weight
+      of C is less than 1, so a shortest odd closed walk through every fractional vertex is computed with Dijkstra's
+      algorithm on the bipartite double cover and reduced to an odd cycle.
 
-def add_min_number_of_edges_in_frames_constraints(crossing_graph: nx.Graph, model: gp.Model, num_frames: int, x_vars,
-                                                  min_var):
-    model.addConstrs(gp.quicksum(x_vars[e, t] for e in crossing_graph.nodes) >= min_var for t in range(num_frames))
+    Every cut is only returned once.
 
+    :param crossing_graph: The conflict graph.
+    :param max_cuts: The maximum number of cuts per call of separate.
+    :param tolerance: The minimum violation of a cut, and the minimum value of a vertex to be considered.
+    """
 
-def add_continuity_constraints(crossing_graph: nx.Graph, model: gp.Model, num_frames: int, x_vars, z_vars):
-    model.addConstrs(gp.quicksum(z_vars[e, t] for t in range(num_frames)) == 1 for e in crossing_graph.nodes)
-    model.addConstrs(z_vars[e, t] + x_vars[e, t-1] >= x_vars[e, t] for e in crossing_graph.nodes
-                     for t in range(1, num_frames))
-    model.addConstrs(z_vars[e, 0] >= x_vars[e, 0] for e in crossing_graph.nodes)
-    model.addConstrs(gp.quicksum(z_vars[e, t] for e in crossing_graph.nodes) <= 1 for t in range(1, num_frames))
+    def __init__(self, crossing_graph: nx.Graph, max_cuts: int = 100, tolerance: float = 1e-3):
+        node_index = {e: i for i, e in enumerate(crossing_graph.nodes)}
+        self.adjacency = [set() for _ in node_index]
+        for e, f in crossing_graph.edges:
+            if e != f:
+                self.adjacency[node_index[e]].add(node_index[f])
+                self.adjacency[node_index[f]].add(node_index[e])
+        self.max_cuts = max_cuts
+        self.tolerance = tolerance
+        self._added = set()
+
+    def separate(self, x_values: np.ndarray) -> list[tuple[list[int], int, float]]:
+        """
+        Returns violated cuts as triplets (indices of the edges, frame, right-hand side) of sum x[e, t] <= right-hand
+        side.
+
+        :param x_values: The (n, num_frames) array of the values of the x variables in the LP relaxation.
+        """
+        cuts = []
+        for t in range(x_values.shape[1]):
+            values = x_values[:, t]
+            support = [i for i in np.argsort(-values, kind="stable").tolist() if values[i] > self.tolerance]
+            for vertices, rhs in self._clique_cuts(values, support) + self._odd_cycle_cuts(values, support):
+                key = (tuple(sorted(vertices)), t)
+                if key not in self._added:
+                    self._added.add(key)
+                    cuts.append((list(key[0]), t, rhs))
+                    if len(cuts) >= self.max_cuts:
+                        return cuts
+        return cuts
+
+    def _clique_cuts(self, values: np.ndarray, support: list[int]) -> list[tuple[list[int], float]]:
+        cuts = []
+        for seed in support:
+            clique = [seed]
+            common = set(self.adjacency[seed])
+            for v in support:
+                if v in common:
+                    clique.append(v)
+                    common &= self.adjacency[v]
+            if len(clique) > 2 and values[clique].sum() > 1 + self.tolerance:
+                # Vertices with value 0 do not change the violation, but strengthen the cut.
+                while common:
+                    v = min(common)
+                    clique.append(v)
+                    common &= self.adjacency[v]
+                cuts.append((clique, 1))
+        return cuts
+
+    def _odd_cycle_cuts(self, values: np.ndarray, support: list[int]) -> list[tuple[list[int], float]]:
+        in_support = set(support)
+        cuts = []
+        for source in support:
+            if values[source] >= 1 - self.tolerance:
+                continue
+            cycle = self._shortest_odd_cycle(values, in_support, source)
+            if cycle is not None and len(cycle) > 3 and values[cycle].sum() > (len(cycle) - 1) / 2 + self.tolerance:
+                cuts.append((cycle, (len(cycle) - 1) // 2))
+        return cuts
+
+    def _shortest_odd_cycle(self, values: np.ndarray, in_support: set[int], source: int) -> list[int] | None:
+        # Dijkstra on the bipartite double cover from (source, 0) to (source, 1), only walks of weight < 1 matter.
+        limit = 1 - self.tolerance
+        distance = {(source, 0): 0.0}
+        parent = dict()
+        heap = [(0.0, source, 0)]
+        while heap:
+            d, v, parity = heappop(heap)
+            if (v, parity) == (source, 1):
+                break
+            if d > distance[(v, parity)]:
+                continue
+            for w in self.adjacency[v]:
+                if w not in in_support:
+                    continue
+                d_w = d + max(0.0, 1 - values[v] - values[w])
+                if d_w < limit and d_w < distance.get((w, 1 - parity), limit):
+                    distance[(w, 1 - parity)] = d_w
+                    parent[(w, 1 - parity)] = (v, parity)
+                    heappush(heap, (d_w, w, 1 - parity))
+        else:
+            return None
+
+        walk = [source]
+        state = (source, 1)
+        while state != (source, 0):
+            state = parent[state]
+            walk.append(state[0])
+        return _odd_cycle(walk)
+
+
+def _odd_cycle(walk: list[int]) -> list[int]:
+    """
+    Returns the vertices of an odd cycle whose edges are a subset of the edges of the closed walk of odd length
+    walk[0], ..., walk[-1] = walk[0].
+    """
+    while True:
+        position = dict()
+        for j, v in enumerate(walk[:-1]):
+            if v in position:
+                i = position[v]
+                # Splitting at the repeated vertex gives two closed walks, one of them has odd length.
+                walk = walk[i:j + 1] if (j - i) % 2 == 1 else walk[:i] + walk[j:]
+                break
+            position[v] = j
+        else:
+            return walk[:-1]
@@ -0,0 +1,189 @@
+import hashlib
+import os
+import networkx as nx
+import numpy as np
+
+from io_tools.crossing_graph import get_crossing_graph
+from tree_decomposition import select_tree_decomposition
+
+# Bump this whenever the crossing graph or the tree decomposition computation changes, so that stale entries are
+# not used anymore.
+CACHE_VERSION = 2
+
+
+class PreprocessingCache:
+    """
+    A persistent, content-addressed cache for the preprocessing steps of an experiment, i.e., the conflict graph of a
+    drawing and the tree decomposition of a conflict graph. Entries are stored as .npz files of integer arrays and are
+    only read when they are requested. If the cache grows larger than max_size_bytes, the least recently used entries
+    are removed.
+
+    :param directory: The directory in which the entries are stored.
+    :param max_size_bytes: The maximum total size of all entries.
+    """
+    directory: str
+    max_size_bytes: int
+
+    def __init__(self, directory: str = ".preprocessing_cache", max_size_bytes: int = 1 << 30):
+        self.directory = directory
+        self.max_size_bytes = max_size_bytes
+
+        if not os.path.exists(directory):
+            os.makedirs(directory, exist_ok=True)
+
+    def crossing_graph(self, file: str, graph: nx.Graph, vertex_position: dict) -> nx.Graph:
+        """
+        Returns the conflict graph of the drawing that was read from file. The conflict graph is only computed if the
+        cache does not contain an entry for the contents of the file yet.
+
+        :param file: The path of the file from which the drawing was read.
+        :param graph: The graph of the drawing.
+        :param vertex_position: A dictionary that maps the vertices of the graph to a tuple of 2-D coordinates.
+        :returns: The conflict graph.
+        """
+        with open(file, "rb") as f:
+            key = _digest(b"crossing_graph", f.read())
+
+        arrays = self._load(key)
+        if arrays is not None:
+            return _decode_graph(arrays)
+
+        crossing_graph = get_crossing_graph(graph, vertex_position)
+        self._store(key, _encode_graph(crossing_graph))
+        return crossing_graph
+
+    def tree_decomposition(self, crossing_graph: nx.Graph, time_limit_seconds: float = 1.0) -> tuple[int, nx.Graph]:
+        """
+        Returns the tree width and the tree decomposition selected by select_tree_decomposition. The entry is addressed
+        by the vertices and edges of the conflict graph.
+
+        :param crossing_graph: The conflict graph.
+        :param time_limit_seconds: The time budget of select_tree_decomposition if the entry has to be computed.
+        :returns: The width of the decomposition and the decomposition, whose vertices are frozensets (bags).
+        """
+        nodes = list(crossing_graph.nodes)
+        key = _digest(b"tree_decomposition", repr(nodes).encode(), repr(list(crossing_graph.edges)).encode())
+
+        arrays = self._load(key)
+        if arrays is not None:
+            return _decode_decomposition(arrays, nodes)
+
+        selected = select_tree_decomposition(crossing_graph, time_limit_seconds)
+        treewidth, decomposition = selected.width, selected.decomposition
+        self._store(key, _encode_decomposition(treewidth, decomposition, nodes))
+        return treewidth, decomposition
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.npz")
+
+    def _load(self, key: str):
+        path = self._path(key)
+        if not os.path.exists(path):
+            return None
+
+        try:
+            with np.load(path) as data:
+                arrays = {name: data[name] for name in data.files}
+        except (OSError, ValueError):
+            # A partially written or otherwise broken entry is treated like a miss.
+            return None
+
+        # The modification time serves as the time of the last access for the LRU eviction.
+        os.utime(path)
+        return arrays
+
+    def _store(self, key: str, arrays: dict | None) -> None:
+        if arrays is None:
+            return
+
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez_compressed(f, **arrays)
+        os.replace(tmp_path, path)
+
+        self._evict()
+
+    def _evict(self) -> None:
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith(".npz"):
+                stat = os.stat(os.path.join(self.directory, name))
+                entries.append((stat.st_mtime, stat.st_size, name))
+
+        total_size = sum(size for _, size, _ in entries)
+        for _, size, name in sorted(entries):
+            if total_size <= self.max_size_bytes:
+                break
+            os.remove(os.path.join(self.directory, name))
+            total_size -= size
+
+
+def _digest(*parts: bytes) -> str:
+    h = hashlib.sha256(f"v{CACHE_VERSION}".encode())
+    for part in parts:
+        h.update(len(part).to_bytes(8, "little"))
+        h.update(part)
+    return h.hexdigest()
+
+
+def _encode_nodes(nodes: list) -> np.ndarray | None:
+    try:
+        return np.asarray(nodes, dtype=np.int64)
+    except (TypeError, ValueError):
+        # Only integer vertices and tuples of integers (edges of a drawing) can be stored.
+        return None
+
+
+def _decode_nodes(array: np.ndarray) -> list:
+    if array.ndim == 1:
+        return array.tolist()
+    return [tuple(row) for row in array.tolist()]
+
+
+def _encode_graph(graph: nx.Graph) -> dict | None:
+    nodes = list(graph.nodes)
+    node_array = _encode_nodes(nodes)
+    if node_array is None:
+        return None
+
+    index = {v: i for i, v in enumerate(nodes)}
+    edges = np.asarray([sorted((index[u], index[v])) for u, v in graph.edges], dtype=np.int32).reshape(-1, 2)
+    # get_crossing_graph adds the edges in lexicographic order, which this reproduces, including adjacency order.
+    edges = edges[np.lexsort((edges[:, 1], edges[:, 0]))]
+
+    return {"nodes": node_array, "edges": edges}
+
+
+def _decode_graph(arrays: dict) -> nx.Graph:
+    nodes = _decode_nodes(arrays["nodes"])
+
+    graph = nx.Graph()
+    graph.add_nodes_from(nodes)
+    graph.add_edges_from((nodes[i], nodes[j]) for i, j in arrays["edges"].tolist())
+    return graph
+
+
+def _encode_decomposition(treewidth: int, decomposition: nx.Graph, nodes: list) -> dict:
+    index = {v: i for i, v in enumerate(nodes)}
+    bags = list(decomposition.nodes)
+    bag_index = {bag: i for i, bag in enumerate(bags)}
+
+    bag_offsets = np.cumsum([0] + [len(bag) for bag in bags], dtype=np.int64)
+    bag_vertices = np.asarray([index[v] for bag in bags for v in bag], dtype=np.int32)
+    tree_edges = np.asarray([(bag_index[a], bag_index[b]) for a, b in decomposition.edges],
+                            dtype=np.int32).reshape(-1, 2)
+
+    return {"treewidth": np.asarray(treewidth), "bag_offsets": bag_offsets, "bag_vertices": bag_vertices,
+            "tree_edges": tree_edges}
+
+
+def _decode_decomposition(arrays: dict, nodes: list) -> tuple[int, nx.Graph]:
+    offsets = arrays["bag_offsets"].tolist()
+    vertices = arrays["bag_vertices"].tolist()
+    bags = [frozenset(nodes[i] for i in vertices[start:end]) for start, end in zip(offsets, offsets[1:])]
+
+    decomposition = nx.Graph()
+    decomposition.add_nodes_from(bags)
+    decomposition.add_edges_from((bags[a], bags[b]) for a, b in arrays["tree_edges"].tolist())
+    return int(arrays["treewidth"]), decomposition
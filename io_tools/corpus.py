@@ -0,0 +1,193 @@
+from __future__ import annotations
+import argparse
+import json
+import mmap
+import os
+import networkx as nx
+import numpy as np
+
+from io_tools.crossing_graph import get_crossing_graph, _candidate_pairs, _crossing_pairs
+from io_tools.read_graph import GraphArrays, read_graph
+
+_MAGIC = b"GSCORPUS"
+_VERSION = 1
+_ALIGNMENT = 64
+
+
+def pack_corpus(directory: str, out_file: str, with_crossings: bool = False) -> None:
+    """
+    Packs all graph drawings (.txt and .gml files) of a directory and its subdirectories into a single binary file that
+    can be memory-mapped with Corpus. The drawings are named by their path relative to the directory, with "/" as the
+    separator, e.g., "planar_drawings/planar_10_12_1.txt" for graphgenerator/planar_graphs. The file consists of a JSON header with the names of the graphs and the layout of the arrays, followed
+    by the concatenated coordinates, adjacency lists and, optionally, the crossing pairs of every drawing.
+
+    :param directory: The directory that contains the graph drawings, e.g., graphgenerator/trees.
+    :param out_file: The path of the packed file.
+    :param with_crossings: If True, the crossing pairs of every drawing are precomputed and stored as well.
+    :raises ValueError: If the directory does not contain any drawing.
+    """
+    names = sorted(_drawing_names(directory))
+    if not names:
+        raise ValueError(f"{directory} does not contain any .txt or .gml drawings")
+
+    coordinates, indptrs, indices, crossings = [], [], [], []
+    vertex_offsets, index_offsets, crossing_offsets = [0], [0], [0]
+
+    for name in names:
+        drawing = read_graph(os.path.join(directory, name))
+        coordinates.append(drawing.coordinates)
+        indptrs.append(drawing.indptr)
+        indices.append(drawing.indices)
+        vertex_offsets.append(vertex_offsets[-1] + drawing.num_vertices)
+        index_offsets.append(index_offsets[-1] + len(drawing.indices))
+
+        pairs = np.empty((0, 2), dtype=np.int32)
+        if with_crossings and not np.isnan(drawing.coordinates).any():
+            graph, pos = drawing.to_networkx()
+            segments = [(pos[u], pos[v]) for u, v in graph.edges]
+            pairs = np.asarray(_crossing_pairs(segments, _candidate_pairs(segments)), dtype=np.int32).reshape(-1, 2)
+        crossings.append(pairs)
+        crossing_offsets.append(crossing_offsets[-1] + len(pairs))
+
+    arrays = {
+        "vertex_offsets": np.asarray(vertex_offsets, dtype=np.int64),
+        "index_offsets": np.asarray(index_offsets, dtype=np.int64),
+        "crossing_offsets": np.asarray(crossing_offsets, dtype=np.int64),
+        "coordinates": np.concatenate(coordinates or [np.empty((0, 2))]).astype(np.float64),
+        "indptr": np.concatenate(indptrs or [np.empty(0)]).astype(np.int64),
+        "indices": np.concatenate(indices or [np.empty(0)]).astype(np.int64),
+        "crossings": np.concatenate(crossings or [np.empty((0, 2))]).astype(np.int32),
+    }
+
+    layout = {}
+    offset = 0
+    for key, array in arrays.items():
+        layout[key] = {"dtype": array.dtype.str, "shape": list(array.shape), "offset": offset}
+        offset = _align(offset + array.nbytes)
+
+    header = json.dumps({"version": _VERSION, "names": names, "with_crossings": with_crossings,
+                         "arrays": layout}).encode()
+    data_start = _align(len(_MAGIC) + 8 + len(header))
+
+    with open(out_file, "wb") as f:
+        f.write(_MAGIC)
+        f.write(len(header).to_bytes(8, "little"))
+        f.write(header)
+        for key, array in arrays.items():
+            f.seek(data_start + layout[key]["offset"])
+            f.write(np.ascontiguousarray(array).tobytes())
+        f.truncate(data_start + offset)
+
+
+class Corpus:
+    """
+    A read-only, memory-mapped view of a file written by pack_corpus. The drawings are returned as GraphArrays whose
+    arrays point directly into the mapped file, so nothing is parsed or copied. Corpus objects can be sent to worker
+    processes, which map the same file and thus share its pages with all other processes.
+
+    :param file: The path of the packed file.
+    """
+    file: str
+    names: list[str]
+    with_crossings: bool
+
+    def __init__(self, file: str):
+        self.file = file
+
+        with open(file, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if self._mmap[:len(_MAGIC)] != _MAGIC:
+            raise ValueError(f"{file} is not a packed graph corpus")
+
+        header_length = int.from_bytes(self._mmap[len(_MAGIC):len(_MAGIC) + 8], "little")
+        header = json.loads(self._mmap[len(_MAGIC) + 8:len(_MAGIC) + 8 + header_length])
+        if header["version"] != _VERSION:
+            raise ValueError(f"{file} has version {header['version']}, expected {_VERSION}")
+
+        self.names = header["names"]
+        self.with_crossings = header["with_crossings"]
+        self._index = {name: i for i, name in enumerate(self.names)}
+
+        data_start = _align(len(_MAGIC) + 8 + header_length)
+        self._arrays = {}
+        for key, spec in header["arrays"].items():
+            dtype = np.dtype(spec["dtype"])
+            count = int(np.prod(spec["shape"]))
+            self._arrays[key] = np.frombuffer(self._mmap, dtype=dtype, count=count,
+                                              offset=data_start + spec["offset"]).reshape(spec["shape"])
+
+        self._vertex_offsets = self._arrays["vertex_offsets"].tolist()
+        self._index_offsets = self._arrays["index_offsets"].tolist()
+        self._crossing_offsets = self._arrays["crossing_offsets"].tolist()
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __iter__(self):
+        for i, name in enumerate(self.names):
+            yield name, self[i]
+
+    def __getitem__(self, key: int | str) -> GraphArrays:
+        i = self._index[key] if isinstance(key, str) else key
+        v_start, v_end = self._vertex_offsets[i], self._vertex_offsets[i + 1]
+
+        return GraphArrays(
+            coordinates=self._arrays["coordinates"][v_start:v_end],
+            # Every graph has its own indptr array with n+1 entries.
+            indptr=self._arrays["indptr"][v_start + i:v_end + i + 1],
+            indices=self._arrays["indices"][self._index_offsets[i]:self._index_offsets[i + 1]]
+        )
+
+    def crossing_pairs(self, key: int | str) -> np.ndarray:
+        """
+        Returns the precomputed crossing pairs of a drawing. A pair (i, j) refers to the i-th and the j-th edge of the
+        graph returned by GraphArrays.to_networkx.
+        """
+        i = self._index[key] if isinstance(key, str) else key
+        return self._arrays["crossings"][self._crossing_offsets[i]:self._crossing_offsets[i + 1]]
+
+    def crossing_graph(self, key: int | str) -> nx.Graph:
+        """
+        Returns the conflict graph of a drawing. It is identical to the one computed by get_crossing_graph, but uses
+        the precomputed crossing pairs if the corpus has been packed with them.
+        """
+        graph, pos = self[key].to_networkx()
+        if not self.with_crossings:
+            return get_crossing_graph(graph, pos)
+
+        edges = list(graph.edges)
+        crossing_graph = nx.Graph()
+        crossing_graph.add_nodes_from(edges)
+        crossing_graph.add_edges_from((edges[i], edges[j]) for i, j in self.crossing_pairs(key).tolist())
+        return crossing_graph
+
+    def __getstate__(self):
+        return {"file": self.file}
+
+    def __setstate__(self, state):
+        self.__init__(state["file"])
+
+
+def _drawing_names(directory: str) -> list[str]:
+    names = []
+    for root, _, files in os.walk(directory):
+        prefix = os.path.relpath(root, directory)
+        for name in files:
+            if name.endswith((".txt", ".gml")):
+                names.append(name if prefix == os.curdir else "/".join(prefix.split(os.sep) + [name]))
+    return names
+
+
+def _align(offset: int) -> int:
+    return -(-offset // _ALIGNMENT) * _ALIGNMENT
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Pack a directory of graph drawings into a single binary file.")
+    parser.add_argument("directory")
+    parser.add_argument("out_file")
+    parser.add_argument("--with-crossings", action="store_true")
+    args = parser.parse_args()
+
+    pack_corpus(args.directory, args.out_file, args.with_crossings)
@@ -1,22 +1,321 @@
+import math
 import networkx as nx
-from itertools import combinations
+import numpy as np
+from collections import defaultdict
 from shapely.geometry import LineString
 
+# Number of candidate pairs that are tested at once by cross_batch. This bounds the memory on dense drawings.
+_CHUNK_SIZE = 1 << 16
+
 
 def get_crossing_graph(graph: nx.Graph, vertex_position: dict) -> nx.Graph:
+    """
+    Computes the conflict graph of a straight-line drawing, i.e., the graph that has a vertex for every edge of the
+    drawing and an edge between every pair of edges that cross. Edges that share an endpoint do not cross.
+
+    Instead of testing all pairs of edges, the segments are bucketed into a uniform grid over their bounding boxes and
+    only pairs of segments whose bounding boxes overlap are tested exactly, in chunks, by cross_batch.
+
+    :param graph: The graph of the drawing.
+    :param vertex_position: A dictionary that maps the vertices of the graph to a tuple of 2-D coordinates.
+    :returns: The conflict graph.
+    """
     crossing_graph = nx.Graph()
 
-    crossing_graph.add_nodes_from(graph.edges)
-    crossing_graph.add_edges_from([(e, f) for e, f in combinations(graph.edges, 2)
-                                   if _cross(vertex_position[e[0]], vertex_position[e[1]],
-                                            vertex_position[f[0]], vertex_position[f[1]])])
+    edges = list(graph.edges)
+    segments = [(vertex_position[u], vertex_position[v]) for u, v in edges]
+
+    crossing_pairs = _crossing_pairs(segments, _candidate_pairs(segments))
+
+    crossing_graph.add_nodes_from(edges)
+    crossing_graph.add_edges_from([(edges[i], edges[j]) for i, j in crossing_pairs])
     return crossing_graph
 
 
+def _crossing_pairs(segments: list[tuple[tuple, tuple]], pairs: list[tuple[int, int]],
+                    chunk_size: int = _CHUNK_SIZE) -> list[tuple[int, int]]:
+    """
+    Returns the pairs (i, j) of segments that cross, in the order in which they are given.
+    """
+    if not pairs:
+        return []
+
+    coordinates = np.asarray(segments, dtype=float)
+    pairs = np.asarray(pairs, dtype=np.intp)
+
+    crossing = []
+    for start in range(0, len(pairs), chunk_size):
+        chunk = pairs[start:start + chunk_size]
+        first, second = coordinates[chunk[:, 0]], coordinates[chunk[:, 1]]
+        mask = cross_batch(first[:, 0], first[:, 1], second[:, 0], second[:, 1])
+        crossing.extend(map(tuple, chunk[mask].tolist()))
+
+    return crossing
+
+
+def cross_batch(p: np.ndarray, q: np.ndarray, r: np.ndarray, s: np.ndarray) -> np.ndarray:
+    """
+    Vectorized version of _cross. Tests for every k whether the segments p[k]q[k] and r[k]s[k] intersect.
+    Segments that share an endpoint do not cross, and neither do segments of length zero, which matches the
+    behaviour of shapely.
+
+    :param p: An array of shape (k, 2) with the first endpoints of the first segments.
+    :param q: An array of shape (k, 2) with the second endpoints of the first segments.
+    :param r: An array of shape (k, 2) with the first endpoints of the second segments.
+    :param s: An array of shape (k, 2) with the second endpoints of the second segments.
+    :returns: A boolean array of length k.
+    """
+    shared = ((p == r).all(axis=1) | (p == s).all(axis=1) | (q == r).all(axis=1) | (q == s).all(axis=1)
+              | (p == q).all(axis=1) | (r == s).all(axis=1))
+
+    d_p = np.sign(_orientation(r, s, p))
+    d_q = np.sign(_orientation(r, s, q))
+    d_r = np.sign(_orientation(p, q, r))
+    d_s = np.sign(_orientation(p, q, s))
+
+    proper = (d_p * d_q < 0) & (d_r * d_s < 0)
+
+    # An endpoint of one segment lies on the other segment. This also covers collinear overlaps.
+    touching = (((d_p == 0) & _in_box(r, s, p)) | ((d_q == 0) & _in_box(r, s, q))
+                | ((d_r == 0) & _in_box(p, q, r)) | ((d_s == 0) & _in_box(p, q, s)))
+
+    return ~shared & (proper | touching)
+
+
+def _orientation(a: np.ndarray, b: np.ndarray, c: np.ndarray) -> np.ndarray:
+    return (b[:, 0] - a[:, 0]) * (c[:, 1] - a[:, 1]) - (b[:, 1] - a[:, 1]) * (c[:, 0] - a[:, 0])
+
+
+def _in_box(a: np.ndarray, b: np.ndarray, c: np.ndarray) -> np.ndarray:
+    return ((np.minimum(a[:, 0], b[:, 0]) <= c[:, 0]) & (c[:, 0] <= np.maximum(a[:, 0], b[:, 0]))
+            & (np.minimum(a[:, 1], b[:, 1]) <= c[:, 1]) & (c[:, 1] <= np.maximum(a[:, 1], b[:, 1])))
+
+
+def _candidate_pairs(segments: list[tuple[tuple, tuple]]) -> list[tuple[int, int]]:
+    """
+    Returns all pairs (i, j), i < j, of segments whose bounding boxes intersect, in lexicographic order.
+
+    Every segment is registered in all cells of a uniform grid that its bounding box covers. A pair that shares several
+    cells is only reported in the cell that contains the lower left corner of the intersection of both bounding boxes,
+    so no deduplication is necessary.
+    """
+    if len(segments) < 2:
+        return []
+
+    boxes = [_bounding_box(p, q) for p, q in segments]
+    min_x, min_y, cell_size = _grid(boxes)
+
+    def cell(x, y):
+        return int((x - min_x) // cell_size), int((y - min_y) // cell_size)
+
+    buckets = defaultdict(list)
+    for i, (x1, y1, x2, y2) in enumerate(boxes):
+        c_x1, c_y1 = cell(x1, y1)
+        c_x2, c_y2 = cell(x2, y2)
+        for c_x in range(c_x1, c_x2 + 1):
+            for c_y in range(c_y1, c_y2 + 1):
+                buckets[c_x, c_y].append(i)
+
+    pairs = []
+    for key, bucket in buckets.items():
+        for a in range(len(bucket)):
+            i = bucket[a]
+            box_i = boxes[i]
+            for b in range(a + 1, len(bucket)):
+                j = bucket[b]
+                box_j = boxes[j]
+
+                ref_x = max(box_i[0], box_j[0])
+                ref_y = max(box_i[1], box_j[1])
+                if ref_x > min(box_i[2], box_j[2]) or ref_y > min(box_i[3], box_j[3]):
+                    continue
+                if cell(ref_x, ref_y) != key:
+                    continue
+
+                pairs.append((i, j))
+
+    pairs.sort()
+    return pairs
+
+
+def _bounding_box(p: tuple, q: tuple) -> tuple[float, float, float, float]:
+    return min(p[0], q[0]), min(p[1], q[1]), max(p[0], q[0]), max(p[1], q[1])
+
+
+def _grid(boxes: list[tuple[float, float, float, float]]) -> tuple[float, float, float]:
+    """
+    Returns the origin and the cell size of a uniform grid for the given bounding boxes.
+    """
+    min_x = min(box[0] for box in boxes)
+    min_y = min(box[1] for box in boxes)
+    max_x = max(box[2] for box in boxes)
+    max_y = max(box[3] for box in boxes)
+
+    # The cells should be about as large as a typical segment, but the grid should not have more than O(m) cells.
+    mean_extent = sum(max(box[2] - box[0], box[3] - box[1]) for box in boxes) / len(boxes)
+    cells_per_side = math.ceil(math.sqrt(len(boxes)))
+    cell_size = max(mean_extent, max_x - min_x, max_y - min_y) / cells_per_side
+    cell_size = max(cell_size, mean_extent)
+    if cell_size <= 0:
+        cell_size = 1.0
+
+    return min_x, min_y, cell_size
+
+
 def _cross(p: tuple, q: tuple, r: tuple, s: tuple):
     if p in (r, s) or q in (r, s):
         return False
 
     line1 = LineString([p, q])
     line2 = LineString([r, s])
-    return line1.intersects(line2)
\ No newline at end of file
+    return line1.intersects(line2)
+
+
+class IncrementalCrossingGraph:
+    """
+    A conflict graph that is kept up to date while the drawing changes. Moving a vertex, adding an edge or removing an
+    edge only recomputes the conflicts of the affected segments instead of the whole conflict graph. The segments are
+    stored in a uniform grid, so every update costs roughly O(deg * k), where k is the number of segments that are
+    close to the updated segments.
+
+    The wrapped graph and vertex_position dictionary are modified in place.
+
+    :param graph: The graph of the drawing.
+    :param vertex_position: A dictionary that maps the vertices of the graph to a tuple of 2-D coordinates.
+    """
+    graph: nx.Graph
+    vertex_position: dict
+    crossing_graph: nx.Graph
+
+    def __init__(self, graph: nx.Graph, vertex_position: dict):
+        self.graph = graph
+        self.vertex_position = vertex_position
+        self.crossing_graph = get_crossing_graph(graph, vertex_position)
+
+        self._buckets = defaultdict(set)
+        self._cells = dict()
+        self._build_grid([self._box(e) for e in self.crossing_graph.nodes])
+
+        for e in self.crossing_graph.nodes:
+            self._insert(e)
+
+    def move_vertex(self, vertex, position: tuple) -> None:
+        """
+        Moves a vertex to a new position and updates the conflicts of all incident edges.
+        """
+        incident_edges = [self._edge(vertex, u) for u in self.graph.neighbors(vertex)]
+
+        for e in incident_edges:
+            self._remove(e)
+
+        self.vertex_position[vertex] = position
+
+        for e in incident_edges:
+            self._insert(e)
+            self._add_conflicts(e)
+
+    def add_edge(self, u, v) -> None:
+        """
+        Adds the edge (u, v) to the drawing and the conflict graph. Both vertices must have a position.
+        """
+        if self.graph.has_edge(u, v):
+            return
+
+        self.graph.add_edge(u, v)
+        self.crossing_graph.add_node((u, v))
+        self._insert((u, v))
+        self._add_conflicts((u, v))
+
+    def remove_edge(self, u, v) -> None:
+        """
+        Removes the edge (u, v) from the drawing and the conflict graph.
+        """
+        e = self._edge(u, v)
+
+        self._remove(e)
+        self.crossing_graph.remove_node(e)
+        self.graph.remove_edge(u, v)
+
+    def _edge(self, u, v) -> tuple:
+        return (u, v) if (u, v) in self.crossing_graph else (v, u)
+
+    def _box(self, e: tuple) -> tuple[float, float, float, float]:
+        return _bounding_box(self.vertex_position[e[0]], self.vertex_position[e[1]])
+
+    def _cell(self, x: float, y: float) -> tuple[int, int]:
+        return int((x - self._min_x) // self._cell_size), int((y - self._min_y) // self._cell_size)
+
+    def _build_grid(self, boxes: list[tuple[float, float, float, float]]) -> None:
+        """
+        Chooses the grid for the given bounding boxes. The indexed extent is their bounding box, padded by half of its
+        size on every side. Boxes within the extent cover O(m) cells, boxes outside of it trigger _rebuild_grid, so
+        the grid adapts to a drawing that grows or moves away from its initial bounding box.
+        """
+        if boxes:
+            min_x, min_y, cell_size = _grid(boxes)
+            max_x = max(box[2] for box in boxes)
+            max_y = max(box[3] for box in boxes)
+        else:
+            min_x, min_y, cell_size = 0.0, 0.0, 1.0
+            max_x, max_y = 0.0, 0.0
+
+        pad_x, pad_y = (max_x - min_x) / 2, (max_y - min_y) / 2
+        self._extent = (min_x - pad_x, min_y - pad_y, max_x + pad_x, max_y + pad_y)
+        self._min_x, self._min_y, self._cell_size = min_x, min_y, cell_size
+
+    def _rebuild_grid(self, box: tuple[float, float, float, float]) -> None:
+        """
+        Builds a new grid for the indexed segments and the bounding box of a segment that is about to be inserted, and
+        registers the indexed segments in it again.
+        """
+        indexed = list(self._cells)
+        self._build_grid([self._box(e) for e in indexed] + [box])
+        self._buckets.clear()
+        self._cells.clear()
+        for e in indexed:
+            self._insert(e)
+
+    def _insert(self, e: tuple) -> None:
+        x1, y1, x2, y2 = box = self._box(e)
+        if not _box_contains(self._extent, box):
+            self._rebuild_grid(box)
+        c_x1, c_y1 = self._cell(x1, y1)
+        c_x2, c_y2 = self._cell(x2, y2)
+
+        cells = [(c_x, c_y) for c_x in range(c_x1, c_x2 + 1) for c_y in range(c_y1, c_y2 + 1)]
+        for c in cells:
+            self._buckets[c].add(e)
+        self._cells[e] = cells
+
+    def _remove(self, e: tuple) -> None:
+        for c in self._cells.pop(e):
+            self._buckets[c].discard(e)
+            if not self._buckets[c]:
+                del self._buckets[c]
+
+        self.crossing_graph.remove_edges_from(list(self.crossing_graph.edges(e)))
+
+    def _add_conflicts(self, e: tuple) -> None:
+        candidates = set()
+        for c in self._cells[e]:
+            candidates.update(self._buckets[c])
+
+        box = self._box(e)
+        candidates = [f for f in candidates if f != e and _boxes_intersect(box, self._box(f))]
+        if not candidates:
+            return
+
+        p, q = self.vertex_position[e[0]], self.vertex_position[e[1]]
+        first = np.asarray([(p, q)] * len(candidates), dtype=float)
+        second = np.asarray([(self.vertex_position[f[0]], self.vertex_position[f[1]]) for f in candidates], dtype=float)
+        mask = cross_batch(first[:, 0], first[:, 1], second[:, 0], second[:, 1])
+
+        self.crossing_graph.add_edges_from((e, f) for f, crossing in zip(candidates, mask) if crossing)
+
+
+def _boxes_intersect(box1: tuple, box2: tuple) -> bool:
+    return box1[0] <= box2[2] and box2[0] <= box1[2] and box1[1] <= box2[3] and box2[1] <= box1[3]
+
+
+def _box_contains(outer: tuple, inner: tuple) -> bool:
+    return outer[0] <= inner[0] and outer[1] <= inner[1] and inner[2] <= outer[2] and inner[3] <= outer[3]
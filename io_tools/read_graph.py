@@ -1,23 +1,129 @@
+from __future__ import annotations
+from dataclasses import dataclass
+import re
 import networkx as nx
+import numpy as np
 
 
-def read_hog(file: str) -> tuple[nx.Graph, dict]:
-    with open(file, "r") as file:
-        pos = dict()
+_GML_TOKEN = re.compile(r'"[^"]*"|\[|\]|[^\s\[\]]+')
+
+
+@dataclass(frozen=True)
+class GraphArrays:
+    """
+    A graph drawing stored as NumPy arrays. The neighbours of vertex i are indices[indptr[i]:indptr[i+1]] (CSR format),
+    in the order in which they appear in the input file. Vertices without a position have the coordinates (nan, nan).
+
+    :param coordinates: An array of shape (n, 2) with the position of every vertex.
+    :param indptr: An array of length n+1 with the offsets of the adjacency lists.
+    :param indices: The concatenated adjacency lists.
+    """
+    coordinates: np.ndarray
+    indptr: np.ndarray
+    indices: np.ndarray
+
+    @property
+    def num_vertices(self) -> int:
+        return len(self.indptr) - 1
+
+    def edges(self) -> np.ndarray:
+        """
+        Returns every edge exactly once as a row (u, v) with u < v, sorted lexicographically.
+        """
+        rows = np.repeat(np.arange(self.num_vertices, dtype=self.indices.dtype), np.diff(self.indptr))
+        edges = np.column_stack((np.minimum(rows, self.indices), np.maximum(rows, self.indices)))
+        return np.unique(edges[edges[:, 0] != edges[:, 1]], axis=0)
+
+    def to_networkx(self) -> tuple[nx.Graph, dict]:
+        """
+        Builds the networkx graph and the position dictionary, exactly as read_hog does.
+        """
         graph = nx.Graph()
+        indptr = self.indptr.tolist()
+        indices = self.indices.tolist()
+        graph.add_edges_from((u, i) for i in range(self.num_vertices) for u in indices[indptr[i]:indptr[i + 1]])
+
+        has_position = (~np.isnan(self.coordinates).any(axis=1)).tolist()
+        pos = {i: (x, y) for i, (x, y) in enumerate(self.coordinates.tolist()) if has_position[i]}
+        return graph, pos
+
+
+def read_graph(file: str) -> GraphArrays:
+    """
+    Reads a graph drawing in one of the formats of the benchmark sets, i.e., a HOG .txt file (number of vertices in the
+    first line, then one line "<x> <y> <neighbours>" per vertex) or an OGDF .gml file.
+
+    :param file: The path of the file.
+    :returns: The graph drawing as NumPy arrays.
+    """
+    with open(file, "r") as f:
+        text = f.read()
+
+    if file.endswith(".gml"):
+        return _parse_gml(text)
+    return _parse_hog(text)
+
+
+def read_hog(file: str) -> tuple[nx.Graph, dict]:
+    """
+    Reads a graph drawing (HOG .txt or OGDF .gml) as a networkx graph and a dictionary of vertex positions.
+    """
+    return read_graph(file).to_networkx()
+
+
+def _parse_hog(text: str) -> GraphArrays:
+    rows = [line.split() for line in text.splitlines()[1:] if line.strip()]
+
+    coordinates = np.array([row[:2] for row in rows], dtype=float).reshape(-1, 2)
+    indptr = np.zeros(len(rows) + 1, dtype=np.int64)
+    np.cumsum([len(row) - 2 for row in rows], out=indptr[1:])
+    indices = np.array([u for row in rows for u in row[2:]], dtype=np.int64)
+
+    return GraphArrays(coordinates, indptr, indices)
+
+
+def _parse_gml(text: str) -> GraphArrays:
+    nodes = []
+    edges = []
+
+    stack = []
+    key = None
+    current = None
+    for token in _GML_TOKEN.findall(text):
+        if token == "[":
+            stack.append(key)
+            if key in ("node", "edge"):
+                current = {}
+            key = None
+        elif token == "]":
+            block = stack.pop()
+            if block == "node":
+                nodes.append((int(current["id"]), float(current.get("x", "nan")), float(current.get("y", "nan"))))
+            elif block == "edge":
+                edges.append((int(current["source"]), int(current["target"])))
+        elif key is None:
+            key = token
+        else:
+            # Only the keys directly inside a node or edge and the coordinates inside its graphics block are relevant.
+            if current is not None and stack and (stack[-1] in ("node", "edge") or stack[-2:] == ["node", "graphics"]):
+                current.setdefault(key, token)
+            key = None
 
-        _ = file.readline()  # read number of vertices
+    index = {node_id: i for i, (node_id, _, _) in enumerate(nodes)}
+    coordinates = np.array([(x, y) for _, x, y in nodes], dtype=float).reshape(-1, 2)
+    edges = np.array([(index[s], index[t]) for s, t in edges], dtype=np.int64).reshape(-1, 2)
 
-        for i, line in enumerate(file.readlines()):
-            x, y, *neighbours = line.strip().split(" ")
-            pos[i] = (float(x), float(y))
+    # Symmetric adjacency lists that keep the order of the edges in the file.
+    source = np.concatenate((edges[:, 0], edges[:, 1]))
+    target = np.concatenate((edges[:, 1], edges[:, 0]))
+    order = np.argsort(source, kind="stable")
 
-            for u in neighbours:
-                graph.add_edge(int(u), i)
+    indptr = np.zeros(len(nodes) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(source, minlength=len(nodes)), out=indptr[1:])
 
-    return graph, pos
+    return GraphArrays(coordinates, indptr, target[order])
 
 
 if __name__ == '__main__':
     g, p = read_hog("../house_of_graphs/1004.txt")
-    print(g, p)
\ No newline at end of file
+    print(g, p)
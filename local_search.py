@@ -0,0 +1,229 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from time import perf_counter
+from typing import Callable
+import random
+
+from frame import FrameEvent, FrameEventType
+import networkx as nx
+
+
+@dataclass
+class LocalSearchResult:
+    """
+    The result of improve_story.
+
+    :param frame_events: The best story that was found.
+    :param objective: The minimum number of edges in a frame of the best story.
+    :param initial_objective: The minimum number of edges in a frame of the normalized input story.
+    :param iterations: The number of moves that were evaluated.
+    :param interrupted: True if the search was stopped by a KeyboardInterrupt.
+    """
+    frame_events: list[FrameEvent]
+    objective: int
+    initial_objective: int
+    iterations: int
+    interrupted: bool
+
+
+def improve_story(crossing_graph: nx.Graph, frame_events: [FrameEvent], time_limit_seconds: float,
+                  seed: int | None = None, max_shift: int = 8,
+                  on_improvement: Callable[[int], None] | None = None) -> LocalSearchResult:
+    """
+    Anytime local search that tries to increase the minimum number of edges in a frame of a story, e.g., of a story
+    computed by compute_frames_greedy.
+
+    The story is represented by its initial frame and the order in which the remaining edges are inserted, one per
+    frame. Every edge disappears exactly when the first crossing edge is inserted after it, i.e., as late as possible,
+    so every insertion order yields a valid story. The moves swap two consecutive insertions or shift the insertion of
+    an edge up to max_shift frames earlier. Swapping the insertions of two non-crossing edges in frames t and t+1 only
+    changes the number of edges in frame t, so a move is evaluated with a few degree-sized counts and O(1) updates of
+    the frame sizes, which also keep track of the minimum. Moves that do not make the objective (the minimum, then the
+    number of frames attaining it) worse are accepted, others are undone.
+
+    The search stops after time_limit_seconds or on a KeyboardInterrupt and returns the best story found so far.
+
+    :param crossing_graph: The conflict graph of the graph drawing.
+    :param frame_events: A valid, sorted story.
+    :param time_limit_seconds: The wall-clock budget.
+    :param seed: The seed of the random number generator that picks the moves.
+    :param max_shift: The maximum number of frames by which the insertion of an edge is shifted in one move.
+    :param on_improvement: A function that is called with the new best objective whenever it improves.
+    :returns: The best story and its objective.
+    """
+    deadline = perf_counter() + time_limit_seconds
+    rng = random.Random(seed)
+    state = _InsertionOrder(crossing_graph, frame_events)
+
+    best_objective = state.sizes.minimum
+    best_order = list(state.order)
+    initial_objective = best_objective
+
+    iterations = 0
+    interrupted = False
+    try:
+        while perf_counter() < deadline:
+            # The first and the last frame do not change under swaps, so they bound the objective.
+            if state.num_frames < 3 or best_objective >= min(state.sizes.sizes[0], state.sizes.sizes[-1]):
+                break
+
+            iterations += 1
+            t = rng.choice(state.sizes.frames_with_size(state.sizes.minimum))
+            if t == 0 or t == state.num_frames - 1:
+                t = rng.randrange(1, state.num_frames - 1)
+
+            # Shift the insertion of frame t + shift to frame t. This changes the frames t, ..., t + shift - 1.
+            shift = rng.randint(1, min(max_shift, state.num_frames - 1 - t))
+            before = state.sizes.key()
+            for s in reversed(range(t, t + shift)):
+                state.swap(s)
+
+            if state.sizes.key() < before:
+                for s in range(t, t + shift):
+                    state.swap(s)
+            elif state.sizes.minimum > best_objective:
+                best_objective = state.sizes.minimum
+                best_order = list(state.order)
+                if on_improvement is not None:
+                    on_improvement(best_objective)
+    except KeyboardInterrupt:
+        interrupted = True
+
+    return LocalSearchResult(frame_events=state.to_frame_events(best_order), objective=best_objective,
+                             initial_objective=initial_objective, iterations=iterations, interrupted=interrupted)
+
+
+class _FrameSizes:
+    """
+    The number of edges in every frame together with the frames of every size, so that the minimum and the frames
+    attaining it are available in O(1).
+    """
+
+    def __init__(self, sizes: list[int]):
+        self.sizes = sizes
+        self._frames = dict()
+        self._position = [0] * len(sizes)
+        for t, size in enumerate(sizes):
+            self._add(t, size)
+        self.minimum = min(sizes)
+
+    def frames_with_size(self, size: int) -> list[int]:
+        return self._frames[size]
+
+    def key(self) -> tuple[int, int]:
+        return self.minimum, -len(self._frames[self.minimum])
+
+    def change(self, t: int, delta: int):
+        if delta == 0:
+            return
+
+        old_size = self.sizes[t]
+        new_size = old_size + delta
+        self._remove(t, old_size)
+        self._add(t, new_size)
+        self.sizes[t] = new_size
+
+        if new_size < self.minimum:
+            self.minimum = new_size
+        while not self._frames.get(self.minimum):
+            self.minimum += 1
+
+    def _add(self, t: int, size: int):
+        frames = self._frames.setdefault(size, [])
+        self._position[t] = len(frames)
+        frames.append(t)
+
+    def _remove(self, t: int, size: int):
+        frames = self._frames[size]
+        last = frames.pop()
+        if last != t:
+            frames[self._position[t]] = last
+            self._position[last] = self._position[t]
+
+
+class _InsertionOrder:
+    """
+    A story given by its initial frame (frame 0) and one inserted edge per frame 1, ..., k, where every edge
+    disappears in the frame in which the first crossing edge is inserted after it.
+    """
+
+    def __init__(self, crossing_graph: nx.Graph, frame_events: [FrameEvent]):
+        self.nodes = list(crossing_graph.nodes)
+        index = {v: i for i, v in enumerate(self.nodes)}
+        self.adjacency = [[index[u] for u in crossing_graph.neighbors(v)] for v in self.nodes]
+
+        initial = [index[e.edge] for e in frame_events if e.frame_type == FrameEventType.IN and e.time == 0]
+        inserted = [index[e.edge] for e in frame_events if e.frame_type == FrameEventType.IN and e.time > 0]
+        # Frames without an insertion only lose edges, so dropping them never decreases the objective.
+        self.initial = initial
+        self.order = [-1] + inserted
+        self.num_frames = len(self.order)
+
+        self.position = [0] * len(self.nodes)
+        for t in range(1, self.num_frames):
+            self.position[self.order[t]] = t
+
+        self.out = [self._out(e) for e in range(len(self.nodes))]
+
+        difference = [0] * (self.num_frames + 1)
+        for e in range(len(self.nodes)):
+            difference[self.position[e]] += 1
+            difference[self.out[e]] -= 1
+        sizes = []
+        size = 0
+        for t in range(self.num_frames):
+            size += difference[t]
+            sizes.append(size)
+        self.sizes = _FrameSizes(sizes)
+
+    def _out(self, e: int) -> int:
+        return min((self.position[f] for f in self.adjacency[e] if self.position[f] > self.position[e]),
+                   default=self.num_frames)
+
+    def swap(self, t: int):
+        """
+        Swaps the insertions in frame t and t+1, 1 <= t < k. Only the size of frame t changes, unless the two edges
+        cross. Then the edge inserted last survives frame t+1 instead of the other one, which changes the frames until
+        the later of the two removals.
+        """
+        a, b = self.order[t], self.order[t + 1]
+        crossing = self.out[a] == t + 1
+        old_out_b = self.out[b]
+
+        # The edges that are present in frame t-1 and removed by a (in frame t) or by b (in frame t+1).
+        removed_by_a = [f for f in self.adjacency[a] if self.position[f] < t and self.out[f] == t]
+        removed_by_b = [f for f in self.adjacency[b] if self.position[f] < t and self.out[f] in (t, t + 1)]
+        self.sizes.change(t, len(removed_by_a) - len(removed_by_b))
+
+        for f in removed_by_a:
+            self.out[f] = t + 1
+        for f in removed_by_b:
+            self.out[f] = t
+
+        self.order[t], self.order[t + 1] = b, a
+        self.position[a], self.position[b] = t + 1, t
+        self.out[a] = self._out(a)
+        self.out[b] = self._out(b)
+
+        if crossing:
+            # Before, b was present in [t+1, old_out_b), now a is present in [t+1, out[a]).
+            delta = 1 if self.out[a] > old_out_b else -1
+            for s in range(min(self.out[a], old_out_b), max(self.out[a], old_out_b)):
+                self.sizes.change(s, delta)
+
+    def to_frame_events(self, order: list[int]) -> list[FrameEvent]:
+        position = [0] * len(self.nodes)
+        for t in range(1, len(order)):
+            position[order[t]] = t
+
+        removed = [[] for _ in range(len(order))]
+        for e in range(len(self.nodes)):
+            out = min((position[f] for f in self.adjacency[e] if position[f] > position[e]), default=len(order))
+            if out < len(order):
+                removed[out].append(e)
+
+        frame_events = [FrameEvent(self.nodes[e], 0, FrameEventType.IN) for e in self.initial]
+        for t in range(1, len(order)):
+            frame_events.extend(FrameEvent(self.nodes[e], t, FrameEventType.OUT) for e in removed[t])
+            frame_events.append(FrameEvent(self.nodes[order[t]], t, FrameEventType.IN))
+        return frame_events
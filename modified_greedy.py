@@ -1,7 +1,13 @@
+from __future__ import annotations
+from dataclasses import dataclass
 from frame import FrameEvent, FrameEventType
+import bisect
+import multiprocessing
 import random
 
+from bitset_graph import BitsetGraph, as_bitset_graph, bits
 from frame_calculations import maximum_pair_optimum_tree, maximum_pair_optimum_decomposition
+from io_tools.cache import PreprocessingCache
 from io_tools.crossing_graph import get_crossing_graph
 from io_tools.output import export_as_gif, export_as_vertex_gif
 from io_tools.read_graph import read_hog
@@ -9,12 +15,16 @@ from io_tools.read_graph import read_hog
 import networkx as nx
 import os
 
-def generate_hog_story(hog_id: int):
+def generate_hog_story(hog_id: int, cache: PreprocessingCache | None = None):
 	if not os.path.exists("hog_stories"):
 		os.mkdir("hog_stories")
 
-	graph, vertex_pos = read_hog(os.path.join("house_of_graphs", f"{hog_id}.txt"))
-	crossing_graph = get_crossing_graph(graph, vertex_pos)
+	hog_file = os.path.join("house_of_graphs", f"{hog_id}.txt")
+	graph, vertex_pos = read_hog(hog_file)
+	if cache is not None:
+		crossing_graph = cache.crossing_graph(hog_file, graph, vertex_pos)
+	else:
+		crossing_graph = get_crossing_graph(graph, vertex_pos)
 
 	isolated_vertices = list(nx.isolates(crossing_graph))
 	crossing_graph.remove_nodes_from(isolated_vertices)
@@ -22,7 +32,10 @@ def generate_hog_story(hog_id: int):
 	if nx.is_tree(crossing_graph):
 		initial_frame, last_frame = maximum_pair_optimum_tree(crossing_graph)
 	else:
-		treewidth, decomposition = nx.approximation.treewidth_min_fill_in(crossing_graph)
+		if cache is not None:
+			treewidth, decomposition = cache.tree_decomposition(crossing_graph)
+		else:
+			treewidth, decomposition = nx.approximation.treewidth_min_fill_in(crossing_graph)
 		initial_frame, last_frame = maximum_pair_optimum_decomposition(crossing_graph, decomposition)
 
 	frame_events = compute_frames_greedy(crossing_graph, initial_frame, last_frame, 'a')
@@ -55,66 +68,249 @@ def generate_crossing_story(hog_id: int):
 	export_as_vertex_gif(vertex_pos, frames, crossing_graph, out_file=os.path.join("hog_stories", f"{hog_id}.gif"), node_size=16)
 
 
-def compute_frames_greedy(crossing_graph: nx.Graph, initial_frame: list[tuple[int, int]], last_frame: list[tuple[int, int]], variation) -> [FrameEvent]:
+def compute_frames_greedy(crossing_graph: nx.Graph | BitsetGraph, initial_frame: list[tuple[int, int]], last_frame: list[tuple[int, int]], variation,
+						  rng: random.Random | None = None) -> [FrameEvent]:
+	"""
+	Greedy heuristic for an edge story that starts with initial_frame. In every step, the future edge with the minimum
+	number of crossings with the current edges is inserted and the current edges that it crosses are removed. An edge of
+	last_frame is only inserted once it does not cross any future edge anymore.
+
+	The current and future degrees of all future edges are updated incrementally and the insertable edges are kept in a
+	bucket queue indexed by current degree, so a step only costs time proportional to the degrees of the inserted and
+	removed edges.
+
+	:param crossing_graph: The conflict graph of the graph drawing, or a BitsetGraph of it. Variation (b) compares the
+	sets of future neighbours of the ties as bitsets.
+	:param initial_frame: The edges of the first frame.
+	:param last_frame: The edges that should be inserted last.
+	:param variation: 'a' picks a random edge among all edges with the minimum current degree. 'b' additionally
+	restricts these ties to the edges with a maximal set of future neighbours.
+	:param rng: The random number generator that breaks the remaining ties. If rng=None, the global one of the random
+	module is used.
+	:returns: The sorted list of frame events.
+	"""
+	graph = as_bitset_graph(crossing_graph)
+	nodes, index, adjacency = graph.nodes, graph.index, graph.neighbor_lists
+	neighbor_bits = graph.adjacency if variation == 'b' else None
+
+	in_current = [False] * len(nodes)
+	in_future = [True] * len(nodes)
+	in_last_frame = [False] * len(nodes)
+	for v in initial_frame:
+		in_current[index[v]] = True
+		in_future[index[v]] = False
+	for v in last_frame:
+		in_last_frame[index[v]] = True
+
+	current_degree = [sum(in_current[u] for u in neighbors) for neighbors in adjacency]
+	future_degree = [sum(in_future[u] for u in neighbors) for neighbors in adjacency]
+
+	num_buckets = max((len(neighbors) for neighbors in adjacency), default=0) + 1
+	queue = _BucketQueue(num_buckets)
+	# Variation (b) additionally needs the insertable edges that still have future neighbours.
+	positive_queue = _BucketQueue(num_buckets)
+	for i in range(len(nodes)):
+		if in_future[i] and not (in_last_frame[i] and future_degree[i] > 0):
+			queue.insert(i, current_degree[i])
+			if variation == 'b' and future_degree[i] > 0:
+				positive_queue.insert(i, current_degree[i])
 
 	frame_events = [FrameEvent(e, 0, FrameEventType.IN) for e in initial_frame]
-
-	current_graph = nx.Graph()
-	current_graph.add_nodes_from(initial_frame)
-	future_graph = crossing_graph.copy()
-	future_graph.remove_nodes_from(initial_frame)
+	num_future = sum(in_future)
 
 	counter = 1
-	while len(future_graph.nodes) > 0:
-		neighbors_in_current_graph = dict()
-		current_neighbors = dict()
-		neighbors_in_future_graph = dict()
-		future_neighbors = dict()
-
+	while num_future > 0:
 		# STEP 1: Pick a future edge with the minimum current degree
-		for vertex in future_graph.nodes():
-			if not ((vertex in last_frame) and (vertex not in list(nx.isolates(future_graph)))):
-				current_neighbors[vertex] = set(crossing_graph.neighbors(vertex)) & set(current_graph.nodes())
-				neighbors_in_current_graph[vertex] = len(current_neighbors[vertex])
-
-		filtered_nodes = [vertex for vertex, count in neighbors_in_current_graph.items() if count == min(neighbors_in_current_graph.values())]
-
-		if variation == 'b':
-			# (b): Pick a future edge such that the size of the set of all future neighbors of the current neighbors is maximum
-
-			if len(filtered_nodes) > 1:
-				# STEP 2
-				for vertex in filtered_nodes:
-					future_neighbors[vertex] = set()
-					for current_neighbor in current_neighbors[vertex]:
-						future_neighbors[vertex] &= set(crossing_graph.neighbors(current_neighbor)) & set(future_graph.nodes())
-					neighbors_in_future_graph[vertex] = len(future_neighbors[vertex])
-
-				filtered_nodes = [vertex for vertex, count in neighbors_in_future_graph.items() if count == max(neighbors_in_future_graph.values())]
-
-			# STEP 3: Get the one with the maximum future degree
-			if len(filtered_nodes) > 1:
-				future_neighbors = dict()
-				for vertex in filtered_nodes:
-					future_neighbors[vertex] = set(future_graph.neighbors(vertex))
-
-				filtered_nodes = [vertex for vertex, count in future_neighbors.items() if count == max(future_neighbors.values())]
-
-		inserted_vertex = random.choice(list(filtered_nodes))
-		frame_events.append(
-			FrameEvent(inserted_vertex, counter, FrameEventType.IN)
-		)
-		frame_events = frame_events + [FrameEvent(e, counter, FrameEventType.OUT) for e in current_neighbors[inserted_vertex]]
-
-		current_graph.remove_nodes_from(current_neighbors[inserted_vertex])
-		current_graph.add_node(inserted_vertex)
-		future_graph.remove_node(inserted_vertex)
-		counter += 1
+		filtered_nodes = queue.min_bucket()
+
+		if variation == 'b' and len(filtered_nodes) > 1:
+			# STEP 2 of variation (b) intersects every set of future neighbours of the current neighbours with an empty
+			# set, so it never changes the ties and is skipped.
+
+			# STEP 3: Get the ones with a maximal set of future neighbours
+			filtered_nodes = _maximal_future_neighborhoods(queue.min_key, queue, positive_queue, adjacency, neighbor_bits,
+														   in_future, current_degree, future_degree)
+
+		inserted = (rng or random).choice(filtered_nodes)
+		removed = [u for u in adjacency[inserted] if in_current[u]]
+
+		frame_events.extend(FrameEvent(nodes[u], counter, FrameEventType.OUT) for u in removed)
+		frame_events.append(FrameEvent(nodes[inserted], counter, FrameEventType.IN))
+
+		queue.remove(inserted, current_degree[inserted])
+		positive_queue.discard(inserted, current_degree[inserted])
+		in_future[inserted] = False
+		num_future -= 1
+
+		for r in removed:
+			in_current[r] = False
+			for u in adjacency[r]:
+				if in_future[u]:
+					queue.move(u, current_degree[u], current_degree[u] - 1)
+					positive_queue.move(u, current_degree[u], current_degree[u] - 1)
+					current_degree[u] -= 1
+
+		in_current[inserted] = True
+		for u in adjacency[inserted]:
+			if in_future[u]:
+				queue.move(u, current_degree[u], current_degree[u] + 1)
+				positive_queue.move(u, current_degree[u], current_degree[u] + 1)
+				current_degree[u] += 1
+				future_degree[u] -= 1
+				if future_degree[u] == 0:
+					positive_queue.discard(u, current_degree[u])
+					if in_last_frame[u]:
+						queue.insert(u, current_degree[u])
 
-	frame_events = sorted(frame_events)
+		counter += 1
 
 	return frame_events
 
 
+@dataclass
+class MultiStartResult:
+	"""
+	The result of compute_frames_greedy_multistart.
+
+	:param frame_events: The best story that was found.
+	:param objective: The minimum number of edges in a frame of the best story.
+	:param seed: The seed of the restart that found the best story.
+	:param seeds: The seeds of all restarts.
+	:param objectives: The objective of every restart, in the order of seeds.
+	"""
+	frame_events: list[FrameEvent]
+	objective: int
+	seed: int
+	seeds: list[int]
+	objectives: list[int]
+
+
+def compute_frames_greedy_multistart(crossing_graph: nx.Graph | BitsetGraph, initial_frame: list[tuple[int, int]],
+									 last_frame: list[tuple[int, int]], variation, restarts: int, seed: int = 0,
+									 processes: int | None = None) -> MultiStartResult:
+	"""
+	Runs compute_frames_greedy several times with different tie-breaking and keeps the story that maximizes the
+	minimum number of edges in a frame. Restart k uses random.Random(seed + k), so every restart is reproducible.
+
+	The restarts run in a process pool. The conflict graph is converted to a BitsetGraph once and sent once to every
+	worker when the pool starts, and the workers only return objective values; the best story is recomputed from its
+	seed afterwards.
+
+	:param crossing_graph: The conflict graph of the graph drawing.
+	:param initial_frame: The edges of the first frame.
+	:param last_frame: The edges that should be inserted last.
+	:param variation: The variation of compute_frames_greedy.
+	:param restarts: The number of restarts, at least 1.
+	:param seed: The seed of the first restart.
+	:param processes: The number of worker processes. If processes=None, all cores are used. If processes=1, the
+	restarts run in the current process.
+	:returns: The best story and the objective values of all restarts.
+	"""
+	if restarts < 1:
+		raise ValueError(f"restarts must be at least 1, got {restarts}")
+
+	seeds = [seed + k for k in range(restarts)]
+	greedy_args = (as_bitset_graph(crossing_graph), initial_frame, last_frame, variation)
+
+	if processes == 1 or restarts == 1:
+		_init_greedy_worker(*greedy_args)
+		objectives = [_greedy_worker(s) for s in seeds]
+	else:
+		with multiprocessing.Pool(processes, initializer=_init_greedy_worker, initargs=greedy_args) as pool:
+			objectives = pool.map(_greedy_worker, seeds)
+
+	best = max(range(restarts), key=lambda k: (objectives[k], -k))
+	frame_events = compute_frames_greedy(*greedy_args, rng=random.Random(seeds[best]))
+
+	return MultiStartResult(frame_events=frame_events, objective=objectives[best], seed=seeds[best], seeds=seeds,
+							objectives=objectives)
+
+
+_greedy_worker_args = None
+
+
+def _init_greedy_worker(crossing_graph, initial_frame, last_frame, variation):
+	global _greedy_worker_args
+	_greedy_worker_args = (crossing_graph, initial_frame, last_frame, variation)
+
+
+def _greedy_worker(seed: int) -> int:
+	frame_events = compute_frames_greedy(*_greedy_worker_args, rng=random.Random(seed))
+	return FrameEvent.frame_sizes(frame_events)[1]
+
+
+class _BucketQueue:
+	"""
+	Buckets of vertex indices by key. Every bucket is kept sorted, so the vertices with the minimum key are listed in
+	the same order as in the conflict graph.
+	"""
+
+	def __init__(self, num_buckets: int):
+		self.buckets = [[] for _ in range(num_buckets)]
+		self.min_key = num_buckets
+		self.queued = set()
+
+	def insert(self, v: int, key: int):
+		bisect.insort(self.buckets[key], v)
+		self.queued.add(v)
+		self.min_key = min(self.min_key, key)
+
+	def remove(self, v: int, key: int):
+		bucket = self.buckets[key]
+		del bucket[bisect.bisect_left(bucket, v)]
+		self.queued.discard(v)
+
+	def discard(self, v: int, key: int):
+		if v in self.queued:
+			self.remove(v, key)
+
+	def move(self, v: int, key: int, new_key: int):
+		if v in self.queued:
+			self.remove(v, key)
+			self.insert(v, new_key)
+
+	def min_bucket(self) -> list[int]:
+		while not self.buckets[self.min_key]:
+			self.min_key += 1
+		return self.buckets[self.min_key]
+
+
+def _maximal_future_neighborhoods(key: int, queue: _BucketQueue, positive_queue: _BucketQueue,
+								  adjacency: list[list[int]], neighbor_bits: list[int], in_future: list[bool],
+								  current_degree: list[int], future_degree: list[int]) -> list[int]:
+	"""
+	Returns the ties (the vertices in the bucket key of queue) whose set of future neighbours equals the max() of the
+	sets of future neighbours of all ties, where max() compares the sets by inclusion in the order of the ties.
+
+	Instead of scanning all ties, a vertex can only replace the current maximum if it is adjacent to all of its future
+	neighbours, so only the neighbours of one of them have to be considered. positive_queue contains the ties with at
+	least one future neighbour. The sets of future neighbours are bitsets, so an inclusion test is a single &.
+	"""
+	def future_neighbors(v):
+		return bits(u for u in adjacency[v] if in_future[u])
+
+	def is_tie(v):
+		return v in queue.queued and current_degree[v] == key
+
+	ties = queue.buckets[key]
+	best = ties[0]
+	if future_degree[best] == 0:
+		if not positive_queue.buckets[key]:
+			return ties
+		best = positive_queue.buckets[key][0]
+
+	while True:
+		best_neighbors = future_neighbors(best)
+		pivot = min((u for u in adjacency[best] if in_future[u]), key=lambda u: len(adjacency[u]))
+		successors = [v for v in adjacency[pivot] if v > best and future_degree[v] > future_degree[best] and is_tie(v)
+					  and best_neighbors & neighbor_bits[v] == best_neighbors]
+		if not successors:
+			break
+		best = min(successors)
+
+	return sorted(v for v in adjacency[pivot] if future_degree[v] == future_degree[best] and is_tie(v)
+				  and best_neighbors & neighbor_bits[v] == best_neighbors)
+
+
 if __name__ == '__main__':
 	generate_crossing_story(2)
\ No newline at end of file
@@ -0,0 +1,73 @@
+import random
+
+import networkx as nx
+import pytest
+
+from bitset_graph import BitsetGraph, bits, iter_bits
+from frame import FrameEvent, FrameEventType
+from frame_calculations import heuristic_pair, maximum_pair_a, maximum_pair_b
+from modified_greedy import compute_frames_greedy
+
+
+def _reference_greedy(crossing_graph, initial_frame, last_frame, variation, rng):
+    """
+    compute_frames_greedy on networkx sets, without the bucket queues and bitsets.
+    """
+    nodes = list(crossing_graph.nodes)
+    current, future = set(initial_frame), set(nodes) - set(initial_frame)
+    last_frame = set(last_frame)
+    frame_events = [FrameEvent(e, 0, FrameEventType.IN) for e in initial_frame]
+
+    time = 1
+    while future:
+        candidates = [v for v in nodes if v in future
+                      and not (v in last_frame and any(u in future for u in crossing_graph.neighbors(v)))]
+        degree = {v: sum(u in current for u in crossing_graph.neighbors(v)) for v in candidates}
+        ties = [v for v in candidates if degree[v] == min(degree.values())]
+        if variation == 'b' and len(ties) > 1:
+            future_neighbors = {v: {u for u in crossing_graph.neighbors(v) if u in future} for v in ties}
+            best = max(future_neighbors[v] for v in ties)
+            ties = [v for v in ties if future_neighbors[v] == best]
+
+        inserted = rng.choice(ties)
+        removed = [u for u in crossing_graph.neighbors(inserted) if u in current]
+        frame_events.extend(FrameEvent(u, time, FrameEventType.OUT) for u in removed)
+        frame_events.append(FrameEvent(inserted, time, FrameEventType.IN))
+        current.difference_update(removed)
+        current.add(inserted)
+        future.discard(inserted)
+        time += 1
+    return frame_events
+
+
+def _graphs():
+    return [nx.gnp_random_graph(30, p, seed=seed) for seed, p in enumerate((0.05, 0.1, 0.2, 0.4))]
+
+
+def test_bitset_graph_mirrors_graph():
+    crossing_graph = nx.relabel_nodes(nx.gnp_random_graph(20, 0.3, seed=1), lambda v: (v, v + 1))
+    graph = BitsetGraph(crossing_graph)
+
+    assert graph.nodes == list(crossing_graph.nodes) and len(graph) == len(crossing_graph)
+    for i, v in enumerate(graph.nodes):
+        assert set(graph.neighbors(v)) == set(crossing_graph.neighbors(v))
+        assert graph.degree(v) == crossing_graph.degree(v)
+        assert set(graph.labels(graph.adjacency[i])) == set(crossing_graph.neighbors(v))
+    assert list(iter_bits(bits([5, 0, 64]))) == [0, 5, 64]
+
+
+@pytest.mark.parametrize("heuristic", [maximum_pair_a, maximum_pair_b, heuristic_pair])
+def test_pair_heuristics_accept_bitset_graph(heuristic):
+    for crossing_graph in _graphs():
+        assert heuristic(crossing_graph) == heuristic(BitsetGraph(crossing_graph))
+
+
+@pytest.mark.parametrize("variation", ['a', 'b'])
+def test_greedy_matches_set_reference(variation):
+    for crossing_graph in _graphs():
+        initial_frame, last_frame = maximum_pair_a(crossing_graph)
+        for seed in range(5):
+            expected = _reference_greedy(crossing_graph, initial_frame, last_frame, variation, random.Random(seed))
+            for graph in (crossing_graph, BitsetGraph(crossing_graph)):
+                actual = compute_frames_greedy(graph, initial_frame, last_frame, variation, random.Random(seed))
+                assert sorted(actual) == sorted(expected)
@@ -0,0 +1,25 @@
+import networkx as nx
+import pytest
+
+from components import compute_frames_max_min_by_component
+from validation import validate_story
+
+
+@pytest.mark.parametrize("solver", ["gurobi", "cp-sat"])
+def test_singleton_components_have_exact_bounds(solver):
+    crossing_graph = nx.empty_graph(10)
+    crossing_graph.add_edge(0, 1)
+
+    result = compute_frames_max_min_by_component(crossing_graph, processes=1, solver=solver)
+    assert result.objective_value == 9
+    assert result.best_bound == 9
+    assert result.gap == 0
+    assert not validate_story(crossing_graph, result)
+
+
+def test_bound_is_not_below_objective():
+    crossing_graph = nx.disjoint_union(nx.gnp_random_graph(8, 0.4, seed=1), nx.gnp_random_graph(6, 0.5, seed=2))
+    crossing_graph.add_nodes_from(range(14, 17))
+
+    result = compute_frames_max_min_by_component(crossing_graph, processes=1)
+    assert result.best_bound >= result.objective_value
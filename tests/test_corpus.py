@@ -0,0 +1,33 @@
+import os
+import shutil
+
+import pytest
+
+from io_tools.corpus import Corpus, pack_corpus
+from io_tools.read_graph import read_graph
+
+DRAWINGS = os.path.join(os.path.dirname(__file__), os.pardir, "graphgenerator", "caterpillar")
+
+
+def test_pack_nested_directory(tmp_path):
+    directory = tmp_path / "drawings"
+    (directory / "sources").mkdir(parents=True)
+    (directory / "more" / "deeper").mkdir(parents=True)
+    shutil.copy(os.path.join(DRAWINGS, "caterpillar-10-0.txt"), directory / "top.txt")
+    shutil.copy(os.path.join(DRAWINGS, "caterpillar-10-1.txt"), directory / "sources" / "a.txt")
+    shutil.copy(os.path.join(DRAWINGS, "caterpillar-10-2.txt"), directory / "more" / "deeper" / "b.txt")
+    (directory / "more" / "notes.md").write_text("not a drawing")
+
+    out_file = tmp_path / "corpus.bin"
+    pack_corpus(str(directory), str(out_file), with_crossings=True)
+    corpus = Corpus(str(out_file))
+
+    assert corpus.names == ["more/deeper/b.txt", "sources/a.txt", "top.txt"]
+    expected = read_graph(os.path.join(DRAWINGS, "caterpillar-10-2.txt"))
+    assert corpus["more/deeper/b.txt"].indices.tolist() == expected.indices.tolist()
+
+
+def test_pack_directory_without_drawings(tmp_path):
+    (tmp_path / "empty" / "sub").mkdir(parents=True)
+    with pytest.raises(ValueError, match="does not contain any"):
+        pack_corpus(str(tmp_path / "empty"), str(tmp_path / "corpus.bin"))
@@ -0,0 +1,41 @@
+import random
+
+import networkx as nx
+
+from io_tools.crossing_graph import IncrementalCrossingGraph, get_crossing_graph
+
+
+def _same_conflicts(incremental: IncrementalCrossingGraph) -> bool:
+    expected = get_crossing_graph(incremental.graph, incremental.vertex_position)
+    actual = incremental.crossing_graph
+    edges = {frozenset(e) for e in expected.edges}
+    return set(actual.nodes) == set(expected.nodes) and {frozenset(e) for e in actual.edges} == edges
+
+
+def test_add_edge_far_outside_of_empty_drawing():
+    graph = nx.Graph()
+    graph.add_nodes_from(range(4))
+    positions = {0: (0.0, 0.0), 1: (1e4, 1e4), 2: (0.0, 1e4), 3: (1e4, 0.0)}
+    incremental = IncrementalCrossingGraph(graph, positions)
+
+    incremental.add_edge(0, 1)
+    incremental.add_edge(2, 3)
+    assert _same_conflicts(incremental)
+    assert incremental.crossing_graph.number_of_edges() == 1
+
+
+def test_move_vertices_far_outside_of_initial_bounding_box():
+    rng = random.Random(0)
+    graph = nx.gnm_random_graph(30, 60, seed=1)
+    positions = {v: (rng.random(), rng.random()) for v in graph.nodes}
+    incremental = IncrementalCrossingGraph(graph, positions)
+
+    for scale in (1e2, 1e4, 1e6, 1e8):
+        for v in rng.sample(list(graph.nodes), 5):
+            incremental.move_vertex(v, (rng.uniform(-scale, scale), rng.uniform(-scale, scale)))
+        assert _same_conflicts(incremental)
+
+    # Moving the vertices back into the unit square keeps the conflicts correct as well.
+    for v in graph.nodes:
+        incremental.move_vertex(v, (rng.random(), rng.random()))
+    assert _same_conflicts(incremental)
@@ -0,0 +1,33 @@
+import json
+import os
+import shutil
+
+from experiment import ExperimentManager
+
+TREES = os.path.join(os.path.dirname(__file__), os.pardir, "graphgenerator", "trees")
+
+
+def test_run_hog_suite_smoke(tmp_path):
+    directory = tmp_path / "graphs"
+    directory.mkdir()
+    names = sorted(name for name in os.listdir(TREES) if name.startswith("tree_10_"))[:2]
+    for name in names:
+        shutil.copy(os.path.join(TREES, name), directory / name)
+
+    manager = ExperimentManager(str(tmp_path / "results.json"))
+    manager.add_heuristic_variants([("1", "a"), ("2", "b"), ("3", "a")])
+    manager.time_limit_pareto_optimal_pair_seconds = 30
+    manager.time_limit_ilp_seconds = 30
+    manager.run_hog_suite(str(directory))
+
+    with open(tmp_path / "results.json") as f:
+        results = json.load(f)
+    assert sorted(result["name"] for result in results) == sorted(name.split(".")[0] for name in names)
+    for result in results:
+        assert {"1a", "2b", "3a", "ILP"} <= result.keys()
+        assert result["ILP"]["violations"] in (None, [], {})
+
+    # The graphs that are in the output file already are skipped.
+    manager.run_hog_suite(str(directory))
+    with open(tmp_path / "results.json") as f:
+        assert len(json.load(f)) == len(results)
@@ -0,0 +1,97 @@
+from itertools import combinations
+
+import networkx as nx
+import numpy as np
+import pytest
+
+from frame import FrameEvent, FrameEventType
+from ilp import PlanarityCutSeparator, _gap, _odd_cycle, compute_frames_max_min, conflict_clique_cover
+from validation import validate_story
+
+SOLVERS = ["gurobi", "cp-sat"]
+
+
+def _one_conflict_instance():
+    crossing_graph = nx.empty_graph(10)
+    crossing_graph.add_edge(0, 1)
+    # Frame 0 shows every edge but 1, frame 1 swaps 0 for 1, so both frames have 9 edges.
+    frame_events = sorted([FrameEvent(e, 0, FrameEventType.IN) for e in range(10) if e != 1]
+                          + [FrameEvent(0, 1, FrameEventType.OUT), FrameEvent(1, 1, FrameEventType.IN)])
+    return crossing_graph, frame_events
+
+
+@pytest.mark.parametrize("solver", SOLVERS)
+@pytest.mark.parametrize("horizon", ["bound", "warm_start"])
+def test_short_horizon_represents_warm_start(solver, horizon):
+    crossing_graph, frame_events = _one_conflict_instance()
+    assert FrameEvent.frame_sizes(frame_events)[0].tolist() == [9, 9]
+
+    result = compute_frames_max_min(crossing_graph, frame_events=frame_events,
+                                    frames=FrameEvent.iter_crossing_frames(frame_events), verbose=False,
+                                    horizon=horizon, solver=solver)
+    assert result.num_frames == 2
+    assert result.objective_value == 9
+    assert result.best_bound == 9
+    assert result.gap == 0
+    assert FrameEvent.frame_sizes(result)[1] == result.objective_value
+    assert not validate_story(crossing_graph, result)
+
+
+@pytest.mark.parametrize("num_vertices", [1, 3])
+def test_solvers_report_the_same_result(num_vertices):
+    crossing_graph = nx.empty_graph(num_vertices)
+    results = [compute_frames_max_min(crossing_graph, verbose=False, solver=solver) for solver in SOLVERS]
+    for result in results:
+        assert result.objective_value == num_vertices
+        assert result.best_bound == num_vertices
+        assert result.gap == 0
+
+
+def test_gap_without_solution_is_infinite():
+    assert _gap(float("nan"), 3) == float("inf")
+    assert _gap(0, 3) == float("inf")
+    assert _gap(2, 3) == 0.5
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_clique_cover_covers_every_conflict_edge(seed):
+    crossing_graph = nx.gnp_random_graph(25, 0.3, seed=seed)
+    covered = set()
+    for clique in conflict_clique_cover(crossing_graph):
+        assert all(crossing_graph.has_edge(u, v) for u, v in combinations(clique, 2))
+        covered.update(frozenset(pair) for pair in combinations(clique, 2))
+    assert covered == {frozenset(edge) for edge in crossing_graph.edges}
+
+
+def test_odd_cycle_reduces_closed_walk():
+    assert _odd_cycle([0, 1, 2, 0]) == [0, 1, 2]
+    # Splitting at the repeated vertex 1 keeps the odd part, which is the inner walk 1 2 3 1 here ...
+    assert _odd_cycle([0, 1, 2, 3, 1, 4, 0, 5, 6, 0]) == [1, 2, 3]
+    # ... and the outer walk 0 1 5 0 here, since the inner walk 1 2 3 4 1 is even.
+    assert _odd_cycle([0, 1, 2, 3, 4, 1, 5, 0]) == [0, 1, 5]
+
+
+def test_separator_finds_odd_cycle_cut():
+    separator = PlanarityCutSeparator(nx.cycle_graph(5))
+    assert separator.separate(np.full((5, 1), 0.5)) == [([0, 1, 2, 3, 4], 0, 2)]
+    # Every cut is only returned once.
+    assert separator.separate(np.full((5, 1), 0.5)) == []
+
+
+def test_separator_finds_clique_cut():
+    separator = PlanarityCutSeparator(nx.complete_graph(4))
+    assert separator.separate(np.full((4, 2), 0.5)) == [([0, 1, 2, 3], 0, 1), ([0, 1, 2, 3], 1, 1)]
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_clique_planarity_reaches_the_same_optimum(seed):
+    crossing_graph = nx.gnp_random_graph(10, 0.4, seed=seed)
+    objectives = set()
+    for solver, planarity, separate_cuts in [("gurobi", "edges", False), ("gurobi", "cliques", False),
+                                             ("gurobi", "cliques", True), ("cp-sat", "cliques", False)]:
+        result = compute_frames_max_min(crossing_graph, verbose=False, solver=solver, planarity=planarity,
+                                        separate_cuts=separate_cuts)
+        assert result.gap == 0
+        assert not validate_story(crossing_graph, result)
+        objectives.add(result.objective_value)
+    assert len(objectives) == 1
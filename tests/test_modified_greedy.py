@@ -0,0 +1,25 @@
+import networkx as nx
+import pytest
+
+from frame_calculations import maximum_pair_a
+from modified_greedy import compute_frames_greedy_multistart
+
+
+def _instance():
+    crossing_graph = nx.gnp_random_graph(20, 0.2, seed=3)
+    initial_frame, last_frame = maximum_pair_a(crossing_graph)
+    return crossing_graph, list(initial_frame), list(last_frame)
+
+
+def test_multistart_keeps_best_restart():
+    crossing_graph, initial_frame, last_frame = _instance()
+    result = compute_frames_greedy_multistart(crossing_graph, initial_frame, last_frame, 'b', restarts=4, processes=1)
+    assert result.seeds == [0, 1, 2, 3]
+    assert result.objective == max(result.objectives)
+
+
+@pytest.mark.parametrize("restarts", [0, -1])
+def test_multistart_rejects_fewer_than_one_restart(restarts):
+    crossing_graph, initial_frame, last_frame = _instance()
+    with pytest.raises(ValueError, match="restarts must be at least 1"):
+        compute_frames_greedy_multistart(crossing_graph, initial_frame, last_frame, 'a', restarts=restarts)
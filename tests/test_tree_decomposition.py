@@ -0,0 +1,32 @@
+from time import perf_counter
+
+import networkx as nx
+
+from tree_decomposition import select_tree_decomposition
+
+
+def _is_decomposition(graph: nx.Graph, decomposition: nx.Graph) -> bool:
+    if not nx.is_tree(decomposition):
+        return False
+    bags = list(decomposition.nodes)
+    if any(not any(u in bag and v in bag for bag in bags) for u, v in graph.edges):
+        return False
+    # The bags containing a vertex must form a subtree.
+    return all(nx.is_connected(decomposition.subgraph([bag for bag in bags if v in bag])) for v in graph.nodes)
+
+
+def test_small_width_skips_restarts():
+    graph = nx.cycle_graph(6)
+    t1 = perf_counter()
+    result = select_tree_decomposition(graph, time_limit_seconds=10.0)
+    assert perf_counter() - t1 < 1.0
+    assert result.width == 2
+    assert _is_decomposition(graph, result.decomposition)
+
+
+def test_restarts_stop_without_improvement():
+    graph = nx.gnp_random_graph(40, 0.1, seed=2)
+    t1 = perf_counter()
+    result = select_tree_decomposition(graph, time_limit_seconds=30.0, patience=4)
+    assert perf_counter() - t1 < 10.0
+    assert _is_decomposition(graph, result.decomposition)
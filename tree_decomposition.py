@@ -0,0 +1,225 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from heapq import heapify, heappop, heappush
+from time import perf_counter
+import random
+
+import networkx as nx
+
+
+@dataclass
+class TreeDecomposition:
+    """
+    A tree decomposition together with the heuristic that produced it.
+
+    :param width: The width of the decomposition, i.e., the size of its largest bag minus one.
+    :param decomposition: The decomposition as a tree whose vertices are frozensets (bags), like the decompositions of
+        nx.approximation.treewidth_min_fill_in.
+    :param cost: The estimated number of table rows of maximum_pair_optimum_decomposition, see estimate_dp_cost.
+    :param heuristic: The name of the elimination heuristic.
+    """
+    width: int
+    decomposition: nx.Graph
+    cost: int
+    heuristic: str
+
+
+def select_tree_decomposition(graph: nx.Graph, time_limit_seconds: float = 1.0, criterion: str = "cost",
+                              seed: int = 0, patience: int = 8) -> TreeDecomposition:
+    """
+    Runs several elimination heuristics and returns the best decomposition. The min-degree, min-fill and maximum
+    cardinality search orderings are always computed, afterwards min-degree and min-fill orderings with random tie
+    breaking are tried until time_limit_seconds have passed or patience restarts in a row did not improve the best
+    decomposition. There are no restarts if the best deterministic decomposition has width at most 2, which the
+    min-degree ordering finds for every graph of treewidth at most 2.
+
+    :param graph: The graph, usually the conflict graph of a graph drawing.
+    :param time_limit_seconds: The time budget for the randomized restarts.
+    :param criterion: "width" to minimize the width (then the cost) or "cost" to minimize the estimated DP cost (then
+        the width).
+    :param seed: The seed of the randomized restarts.
+    :param patience: The number of randomized restarts without improvement after which the search stops.
+    :returns: The best decomposition.
+    """
+    if criterion not in ("width", "cost"):
+        raise ValueError(f"Unknown criterion {criterion}, expected 'width' or 'cost'")
+
+    deadline = perf_counter() + time_limit_seconds
+    rng = random.Random(seed)
+
+    def key(candidate: TreeDecomposition):
+        return (candidate.width, candidate.cost) if criterion == "width" else (candidate.cost, candidate.width)
+
+    best = None
+    candidates = [("min_degree", min_degree_order, None), ("min_fill", min_fill_order, None),
+                  ("max_cardinality", max_cardinality_order, None)]
+    restart = 0
+    restarts_without_improvement = 0
+    while candidates or (perf_counter() < deadline and restarts_without_improvement < patience):
+        if candidates:
+            name, order_function, order_rng = candidates.pop(0)
+        else:
+            name, order_function = (("random_min_degree", min_degree_order) if restart % 2 == 0
+                                    else ("random_min_fill", min_fill_order))
+            order_rng = rng
+            restart += 1
+
+        width, decomposition = elimination_decomposition(graph, order_function(graph, order_rng))
+        candidate = TreeDecomposition(width, decomposition, estimate_dp_cost(decomposition), name)
+        if best is None or key(candidate) < key(best):
+            best = candidate
+            restarts_without_improvement = 0
+        elif order_rng is not None:
+            restarts_without_improvement += 1
+
+        # The decomposition of a forest cannot get any better, and restarts hardly improve one of width 2.
+        if best.width <= 1 or (not candidates and best.width <= 2):
+            break
+
+    return best
+
+
+def estimate_dp_cost(decomposition: nx.Graph) -> int:
+    """
+    Estimates the work of maximum_pair_optimum_decomposition on a decomposition as the number of colourings of all
+    bags, i.e., the sum of 3^|bag|. This is an upper bound on the number of table rows.
+    """
+    return sum(3 ** len(bag) for bag in decomposition.nodes)
+
+
+def elimination_decomposition(graph: nx.Graph, order: list) -> tuple[int, nx.Graph]:
+    """
+    Builds the tree decomposition of an elimination ordering. Eliminating a vertex turns its remaining neighbourhood
+    into a clique; the bag of the vertex consists of the vertex and this neighbourhood, and its parent is the bag of the
+    neighbour that is eliminated first. The bags of different components are connected in a path.
+
+    :param graph: The graph.
+    :param order: All vertices of the graph in elimination order.
+    :returns: The width and the decomposition, whose vertices are frozensets (bags).
+    """
+    position = {v: i for i, v in enumerate(order)}
+    adjacency = {v: set(graph.neighbors(v)) - {v} for v in graph.nodes}
+
+    decomposition = nx.Graph()
+    bags = dict()
+    roots = []
+    width = -1
+    for v in order:
+        neighbors = _eliminate(adjacency, v)
+        bag = frozenset(neighbors | {v})
+        bags[v] = bag
+        width = max(width, len(bag) - 1)
+        decomposition.add_node(bag)
+
+    for v in reversed(order):
+        higher = [u for u in bags[v] if u != v]
+        if higher:
+            decomposition.add_edge(bags[v], bags[min(higher, key=position.__getitem__)])
+        else:
+            if roots:
+                decomposition.add_edge(bags[v], roots[-1])
+            roots.append(bags[v])
+
+    return max(width, 0), decomposition
+
+
+def min_degree_order(graph: nx.Graph, rng: random.Random | None = None) -> list:
+    """
+    Repeatedly eliminates a vertex of minimum degree in the remaining graph. Ties are broken by the order of the vertices
+    in the graph or, if rng is given, randomly.
+    """
+    adjacency = {v: set(graph.neighbors(v)) - {v} for v in graph.nodes}
+    tie = _tie_breaker(graph, rng)
+
+    heap = [(len(adjacency[v]), tie[v], v) for v in graph.nodes]
+    heapify(heap)
+    order = []
+    while heap:
+        degree, _, v = heappop(heap)
+        if v not in adjacency or degree != len(adjacency[v]):
+            continue
+
+        neighbors = _eliminate(adjacency, v)
+        order.append(v)
+        for u in neighbors:
+            heappush(heap, (len(adjacency[u]), tie[u], u))
+    return order
+
+
+def min_fill_order(graph: nx.Graph, rng: random.Random | None = None) -> list:
+    """
+    Repeatedly eliminates a vertex whose elimination adds the fewest edges. Ties are broken by degree and then by the
+    order of the vertices in the graph or, if rng is given, randomly. Only the scores of vertices within distance two of
+    an eliminated vertex are recomputed.
+    """
+    adjacency = {v: set(graph.neighbors(v)) - {v} for v in graph.nodes}
+    tie = _tie_breaker(graph, rng)
+
+    def entry(u):
+        return _fill_in(adjacency, u), len(adjacency[u]), tie[u], u
+
+    current = {v: entry(v) for v in graph.nodes}
+    heap = list(current.values())
+    heapify(heap)
+    order = []
+    while heap:
+        item = heappop(heap)
+        v = item[3]
+        if current.get(v) != item:
+            continue
+
+        neighbors = _eliminate(adjacency, v)
+        del current[v]
+        order.append(v)
+
+        affected = set(neighbors)
+        for u in neighbors:
+            affected |= adjacency[u]
+        for u in affected:
+            current[u] = entry(u)
+            heappush(heap, current[u])
+    return order
+
+
+def max_cardinality_order(graph: nx.Graph, rng: random.Random | None = None) -> list:
+    """
+    Maximum cardinality search: repeatedly visits an unvisited vertex with the most visited neighbours. The reverse of
+    the visiting order is an elimination ordering, which is perfect on chordal graphs.
+    """
+    tie = _tie_breaker(graph, rng)
+    weight = {v: 0 for v in graph.nodes}
+    heap = [(0, tie[v], v) for v in graph.nodes]
+    heapify(heap)
+    visited = set()
+    visit_order = []
+    while heap:
+        negative_weight, _, v = heappop(heap)
+        if v in visited or -negative_weight != weight[v]:
+            continue
+
+        visited.add(v)
+        visit_order.append(v)
+        for u in graph.neighbors(v):
+            if u not in visited:
+                weight[u] += 1
+                heappush(heap, (-weight[u], tie[u], u))
+    return visit_order[::-1]
+
+
+def _tie_breaker(graph: nx.Graph, rng: random.Random | None) -> dict:
+    if rng is None:
+        return {v: i for i, v in enumerate(graph.nodes)}
+    return {v: rng.random() for v in graph.nodes}
+
+
+def _eliminate(adjacency: dict[object, set], v) -> set:
+    neighbors = adjacency.pop(v)
+    for u in neighbors:
+        adjacency[u].discard(v)
+        adjacency[u].update(neighbors - {u})
+    return neighbors
+
+
+def _fill_in(adjacency: dict[object, set], v) -> int:
+    neighbors = adjacency[v]
+    return sum(len(neighbors - adjacency[u]) - 1 for u in neighbors) // 2
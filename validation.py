@@ -0,0 +1,71 @@
+from __future__ import annotations
+from frame import FrameEvent, FrameEventType, Story
+import networkx as nx
+import numpy as np
+
+# The number of example edges that are listed for each kind of violation.
+_NUM_EXAMPLES = 3
+
+
+def validate_story(crossing_graph: nx.Graph, frame_events: [FrameEvent] | Story) -> list[str]:
+    """
+    Checks that a list of frame events is a valid story of the drawing with the given conflict graph, i.e., every edge
+    appears exactly once and disappears at most once, afterwards (so it is present in one contiguous interval of
+    frames), and no two crossing edges are present in the same frame.
+
+    Instead of building the frames, every edge is turned into the interval [IN, OUT) of frames in which it is present
+    and the intervals of the end vertices of every conflict edge are tested for overlap. This takes O(#events + n + m)
+    time.
+
+    :param crossing_graph: The conflict graph of the graph drawing.
+    :param frame_events: The story as a list of frame events or as a Story.
+    :returns: A description of every kind of violation. The list is empty if the story is valid.
+    """
+    story = frame_events if isinstance(frame_events, Story) else Story.from_frame_events(frame_events)
+    nodes = list(crossing_graph.nodes)
+    index = {v: i for i, v in enumerate(nodes)}
+    problems = []
+
+    edge_nodes = np.asarray([index.get(e, -1) for e in story.edges], dtype=np.int64)
+    if (edge_nodes < 0).any():
+        unknown = [story.edges[i] for i in np.flatnonzero(edge_nodes < 0)]
+        problems.append(_describe(unknown, "edges are not vertices of the conflict graph"))
+
+    event_nodes = edge_nodes[story.edge_ids]
+    known = event_nodes >= 0
+    is_in = known & (story.frame_types == FrameEventType.IN)
+    is_out = known & (story.frame_types == FrameEventType.OUT)
+
+    in_count = np.bincount(event_nodes[is_in], minlength=len(nodes))
+    out_count = np.bincount(event_nodes[is_out], minlength=len(nodes))
+
+    in_time = np.zeros(len(nodes), dtype=np.int64)
+    in_time[event_nodes[is_in]] = story.times[is_in]
+    out_time = np.full(len(nodes), np.iinfo(np.int64).max, dtype=np.int64)
+    out_time[event_nodes[is_out]] = story.times[is_out]
+
+    for mask, description in ((in_count == 0, "edges never appear"),
+                              (in_count > 1, "edges appear more than once"),
+                              (out_count > 1, "edges disappear more than once"),
+                              ((in_count == 1) & (out_count == 1) & (out_time <= in_time),
+                               "edges disappear before they appear")):
+        if mask.any():
+            problems.append(_describe([nodes[i] for i in np.flatnonzero(mask)], description))
+
+    # Only edges with a single interval can be checked for overlaps.
+    has_interval = (in_count == 1) & (out_count <= 1) & (out_time > in_time)
+
+    conflicts = np.asarray([(index[e], index[f]) for e, f in crossing_graph.edges], dtype=np.int64).reshape(-1, 2)
+    u, v = conflicts[:, 0], conflicts[:, 1]
+    overlap = (has_interval[u] & has_interval[v]
+               & (np.maximum(in_time[u], in_time[v]) < np.minimum(out_time[u], out_time[v])))
+    if overlap.any():
+        crossing_pairs = [(nodes[u[i]], nodes[v[i]]) for i in np.flatnonzero(overlap)]
+        problems.append(_describe(crossing_pairs, "pairs of crossing edges share a frame"))
+
+    return problems
+
+
+def _describe(items: list, description: str) -> str:
+    examples = ", ".join(str(item) for item in items[:_NUM_EXAMPLES])
+    return f"{len(items)} {description} (e.g. {examples})"